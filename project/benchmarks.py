@@ -0,0 +1,205 @@
+"""Benchmark suite for the computational and plotting entry points.
+
+    python benchmarks.py run [--filter TEXT] [--repeat N] [--max-samples N]
+    python benchmarks.py compare [--baseline N] [--threshold 0.10]
+
+Each run appends wall time (min/median over repeats) and peak traced memory
+per benchmark to a JSON history; compare flags benchmarks whose minimum wall
+time grew by more than the threshold against a baseline run.
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+
+import main
+import utils
+
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.benchmarks', 'history.json')
+
+
+def _render(name):
+    """Build one chart and encode it as PNG in memory"""
+    def run():
+        plot, args = main.CHARTS[name]
+        fig = plot(*args)
+        fig.savefig(io.BytesIO(), format='png', dpi=300, bbox_inches='tight')
+        main.plt.close(fig)
+    return run
+
+
+def _full_report():
+    """generate_all_visualizations into a scratch directory"""
+    def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir, main.OUTPUT_DIR = main.OUTPUT_DIR, tmp
+            try:
+                main.generate_all_visualizations(jobs=1)
+            finally:
+                main.OUTPUT_DIR = output_dir
+    return run
+
+
+def build_benchmarks(max_samples=10**7):
+    """Benchmark name -> zero-argument callable"""
+    m1 = utils.MACRO1
+    benchmarks = {
+        'annuity_factor': lambda: utils.annuity_factor(0.03, utils.N_YEARS),
+        'npv': lambda: utils.npv(m1["capex"], m1["opex"], m1["benefit"], 0.03),
+        'irr': lambda: utils.irr(m1["capex"], m1["opex"], m1["benefit"]),
+        'bcr': lambda: utils.bcr(m1["capex"], m1["opex"], m1["benefit"], 0.03),
+        'scenario_npv': lambda: utils.scenario_npv("MACRO1", 1.0, 1.0, 1.0),
+        'get_scenario_data': utils.get_scenario_data,
+        'tornado_data': utils.tornado_data,
+        'sensitivity_curves': utils.sensitivity_curves,
+    }
+    for exponent in range(3, 8):
+        n = 10**exponent
+        if n <= max_samples:
+            benchmarks[f'monte_carlo_1e{exponent}'] = lambda n=n: utils.monte_carlo(n_samples=n)
+    for name in main.CHARTS:
+        benchmarks[f'plot_{name}'] = _render(name)
+    benchmarks['generate_all_visualizations'] = _full_report()
+    return benchmarks
+
+
+def measure(fn, repeat=5, min_time=0.2):
+    """Wall times over repeat rounds (each looping until min_time) plus one traced run for peak memory"""
+    fn()  # Warm up imports and caches
+
+    # Calibrate the number of calls per round so fast functions are measurable
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or calls >= 10**6:
+            break
+        calls *= 10
+
+    times = [elapsed / calls]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        times.append((time.perf_counter() - start) / calls)
+
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'wall_min_s': min(times),
+        'wall_median_s': statistics.median(times),
+        'calls_per_round': calls,
+        'repeat': repeat,
+        'peak_memory_bytes': peak
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path=HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_history(history, path=HISTORY_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(history, f, indent=2)
+
+
+def run_benchmarks(pattern=None, repeat=5, max_samples=10**7, history_path=HISTORY_PATH):
+    """Run the (filtered) suite, print a table and append the run to the history"""
+    results = {}
+    for name, fn in build_benchmarks(max_samples).items():
+        if pattern and pattern not in name:
+            continue
+        # Benchmarks that render charts print progress; keep the table readable
+        stdout, sys.stdout = sys.stdout, io.StringIO()
+        try:
+            results[name] = measure(fn, repeat)
+        finally:
+            sys.stdout = stdout
+        r = results[name]
+        print(f"{name:40s} {r['wall_min_s'] * 1e3:12.4f} ms  {r['peak_memory_bytes'] / 2**20:10.2f} MiB")
+
+    run = {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'results': results
+    }
+    history = load_history(history_path)
+    history.append(run)
+    save_history(history, history_path)
+    return run
+
+
+def compare(history, baseline=-2, current=-1, threshold=0.10):
+    """Rows of (name, baseline s, current s, ratio, regressed) for benchmarks in both runs"""
+    base, cur = history[baseline]['results'], history[current]['results']
+    rows = []
+    for name in cur:
+        if name in base:
+            ratio = cur[name]['wall_min_s'] / base[name]['wall_min_s']
+            rows.append((name, base[name]['wall_min_s'], cur[name]['wall_min_s'], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the cost-benefit model")
+    parser.add_argument('--history', default=HISTORY_PATH, help="JSON history file")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help="Run the suite and append to the history")
+    run.add_argument('--filter', default=None, help="Only benchmarks whose name contains TEXT")
+    run.add_argument('--repeat', type=int, default=5)
+    run.add_argument('--max-samples', type=int, default=10**7, help="Largest Monte Carlo size to run")
+
+    cmp = sub.add_parser('compare', help="Compare the latest run against a baseline run")
+    cmp.add_argument('--baseline', type=int, default=-2, help="History index of the baseline (default: previous run)")
+    cmp.add_argument('--threshold', type=float, default=0.10, help="Allowed slowdown before flagging (0.10 = 10%%)")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.command == 'run':
+        run_benchmarks(args.filter, args.repeat, args.max_samples, args.history)
+    else:
+        history = load_history(args.history)
+        if len(history) < 2:
+            sys.exit("Need at least two runs in the history to compare")
+        rows = compare(history, args.baseline, threshold=args.threshold)
+        for name, base, cur, ratio, regressed in rows:
+            flag = 'REGRESSION' if regressed else ''
+            print(f"{name:40s} {base * 1e3:12.4f} ms -> {cur * 1e3:12.4f} ms  x{ratio:6.2f}  {flag}")
+        if any(row[-1] for row in rows):
+            sys.exit(1)
@@ -0,0 +1,85 @@
+import numpy as np
+
+# Replicates are drawn in fixed-size blocks, each from its own child stream of
+# the seed (as Monte Carlo samples are), so the intervals do not depend on how
+# many blocks are evaluated together to respect the memory limit
+BOOTSTRAP_BLOCK = 8
+
+STATISTICS = ("mean", "p5", "p95", "prob_negative")
+_QUANTILES = {"p5": 0.05, "p95": 0.95}
+
+# Bytes held per resampled draw (its int32 index); gathered float values are
+# only ever materialised for one block of replicates at a time
+_BYTES_PER_DRAW = 4
+
+
+def _statistics(ordered, idx, threshold):
+    """Every statistic of each row of ordered[idx], for sorted values and a (replicates, n) index matrix
+
+    As ordered is sorted, the k-th smallest resampled value is ordered at the
+    k-th smallest index, so quantiles come from partitioning idx in place
+    (no float copy) and P(value < threshold) from comparing indices. idx is
+    reordered within rows.
+    """
+    n = idx.shape[1]
+    mean = np.concatenate([ordered[idx[i:i + BOOTSTRAP_BLOCK]].mean(axis=1)
+                           for i in range(0, len(idx), BOOTSTRAP_BLOCK)])
+    below = np.count_nonzero(idx < np.searchsorted(ordered, threshold), axis=1) / n
+
+    # Linear interpolation between order statistics, as np.quantile does
+    positions = np.array(list(_QUANTILES.values())) * (n - 1)
+    lower = np.floor(positions).astype(int)
+    upper = np.minimum(lower + 1, n - 1)
+    idx.partition(sorted(set(lower.tolist() + upper.tolist())), axis=1)
+    low_values, high_values = ordered[idx[:, lower]], ordered[idx[:, upper]]
+    quantiles = low_values + (positions - lower) * (high_values - low_values)
+
+    return {"mean": mean, **dict(zip(_QUANTILES, quantiles.T)), "prob_negative": below}
+
+
+def bootstrap_replicates(values, n_boot=1000, seed=0, threshold=0.0, max_bytes=2**30):
+    """{statistic: (n_boot,) array} of the statistics over resamples of values (with replacement)
+
+    Each chunk of replicate blocks draws its resample indices as one
+    (replicates, n) array and reduces it along rows, so memory stays near
+    max_bytes whatever n_boot is; at least one block is evaluated at a time.
+    """
+    ordered = np.sort(np.asarray(values, dtype=float).ravel())
+    n = len(ordered)
+    n_blocks = -(-n_boot // BOOTSTRAP_BLOCK)
+    blocks_per_chunk = max(1, max_bytes // (_BYTES_PER_DRAW * n * BOOTSTRAP_BLOCK))
+
+    replicates = {name: np.empty(n_blocks * BOOTSTRAP_BLOCK) for name in STATISTICS}
+    for start in range(0, n_blocks, blocks_per_chunk):
+        blocks = range(start, min(start + blocks_per_chunk, n_blocks))
+        idx = np.empty((len(blocks) * BOOTSTRAP_BLOCK, n), dtype=np.int32)
+        for i, block in enumerate(blocks):
+            rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block,)))
+            idx[i * BOOTSTRAP_BLOCK:(i + 1) * BOOTSTRAP_BLOCK] = rng.integers(0, n, (BOOTSTRAP_BLOCK, n),
+                                                                              dtype=np.int32)
+        sl = slice(start * BOOTSTRAP_BLOCK, (blocks[-1] + 1) * BOOTSTRAP_BLOCK)
+        for name, stat in _statistics(ordered, idx, threshold).items():
+            replicates[name][sl] = stat
+    return {name: stat[:n_boot] for name, stat in replicates.items()}
+
+
+def bootstrap_intervals(values, n_boot=1000, level=0.95, seed=0, threshold=0.0, max_bytes=2**30):
+    """Percentile bootstrap interval of the mean, P5, P95 and P(value < threshold)
+
+    Returns {statistic: {"estimate", "low", "high", "std_error"}}, the
+    estimate being the statistic of the original sample.
+    """
+    ordered = np.sort(np.asarray(values, dtype=float).ravel())
+    estimates = _statistics(ordered, np.arange(len(ordered))[None], threshold)
+    replicates = bootstrap_replicates(ordered, n_boot, seed, threshold, max_bytes)
+    tail = (1 - level) / 2
+    results = {}
+    for name in STATISTICS:
+        low, high = np.quantile(replicates[name], [tail, 1 - tail])
+        results[name] = {
+            "estimate": estimates[name][0].item(),
+            "low": low.item(),
+            "high": high.item(),
+            "std_error": replicates[name].std(ddof=1).item()
+        }
+    return results
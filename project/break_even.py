@@ -0,0 +1,83 @@
+import numpy as np
+
+from utils import N_YEARS, PROJECTS, annuity_factor_array
+
+# NPV is linear in benefit and in the hardware cost factor, so every threshold
+# below is solved in closed form rather than by bisection.
+
+
+def _columns(projects, ndim):
+    """Project columns shaped to broadcast against ndim-dimensional inputs"""
+    projects = projects or PROJECTS
+    col = (slice(None),) + (None,) * ndim
+    return (projects.capex[col], projects.opex[col], projects.benefit[col], projects.hw_share[col])
+
+
+def adoption_threshold(rates, horizons=N_YEARS, hw=1.0, projects=None):
+    """Benefit multiplier (uptake x compliance) needed for NPV = 0
+
+    Broadcasts over rates, horizons and hardware factors; the result has shape
+    (projects,) + broadcast shape. Equals 1 / BCR at the given hardware factor.
+    """
+    rates, horizons, hw = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (rates, horizons, hw)))
+    capex, opex, benefit, hw_share = _columns(projects, rates.ndim)
+    ann = annuity_factor_array(rates, horizons)
+    adj_capex = capex * (1 - hw_share) + capex * hw_share * hw
+    return (adj_capex + opex * ann) / (benefit * ann)
+
+
+def hardware_threshold(rates, horizons=N_YEARS, uptake=1.0, comp=1.0, projects=None):
+    """Hardware cost factor at which NPV = 0 (NaN for projects without a hardware share)"""
+    rates, horizons, uptake, comp = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (rates, horizons, uptake, comp)))
+    capex, opex, benefit, hw_share = _columns(projects, rates.ndim)
+    ann = annuity_factor_array(rates, horizons)
+    hw_capex = capex * hw_share
+    with np.errstate(divide="ignore", invalid="ignore"):
+        threshold = (benefit * uptake * comp * ann - opex * ann - capex * (1 - hw_share)) / hw_capex
+    return np.where(hw_capex > 0, threshold, np.nan)
+
+
+def uptake_compliance_frontier(uptake, rates=0.008, horizons=N_YEARS, hw=1.0, projects=None):
+    """Compliance needed for NPV = 0 at each uptake: shape (projects,) + broadcast shape
+
+    The NPV = 0 contour in the uptake x compliance plane is the hyperbola
+    uptake * compliance = adoption_threshold.
+    """
+    uptake, rates, horizons, hw = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (uptake, rates, horizons, hw)))
+    return adoption_threshold(rates, horizons, hw, projects) / uptake
+
+
+def npv_grid(uptake, comp, hw=1.0, rates=0.008, horizons=N_YEARS, projects=None):
+    """NPV (€ millions) on a dense grid; inputs broadcast, result is (projects,) + broadcast shape"""
+    uptake, comp, hw, rates, horizons = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (uptake, comp, hw, rates, horizons)))
+    capex, opex, benefit, hw_share = _columns(projects, uptake.ndim)
+    ann = annuity_factor_array(rates, horizons)
+    adj_capex = capex * (1 - hw_share) + capex * hw_share * hw
+    return (benefit * uptake * comp * ann - (adj_capex + opex * ann)) / 1e6
+
+
+def break_even_surface(x, y, x_param="hw", y_param="rate", projects=None, **fixed):
+    """NPV on an x_param x y_param grid plus the NPV = 0 frontier
+
+    x_param / y_param are any two of "uptake", "comp", "hw", "rate", "horizon";
+    other inputs take their values from fixed (defaults: 1.0, 0.8% and N_YEARS).
+    Returns (npv, frontier) where npv has shape (projects, len(y), len(x)) and
+    frontier is the benefit multiplier needed for NPV = 0 at each grid point.
+    """
+    inputs = {"uptake": 1.0, "comp": 1.0, "hw": 1.0, "rate": 0.008, "horizon": N_YEARS}
+    unknown = {x_param, y_param, *fixed} - set(inputs)
+    if unknown:
+        raise ValueError(f"Unknown parameter(s): {', '.join(sorted(unknown))}")
+    inputs.update(fixed)
+    inputs[x_param] = np.asarray(x, dtype=float)[None, :]
+    inputs[y_param] = np.asarray(y, dtype=float)[:, None]
+    # Every input on the full (len(y), len(x)) grid, so the project axis is always leading
+    uptake, comp, hw, rate, horizon = np.broadcast_arrays(
+        *(np.asarray(inputs[name], dtype=float) for name in ("uptake", "comp", "hw", "rate", "horizon")))
+
+    npv = npv_grid(uptake, comp, hw, rate, horizon, projects)
+    frontier = adoption_threshold(rate, horizon, hw, projects) / (uptake * comp)
+    return npv, frontier
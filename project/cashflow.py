@@ -0,0 +1,128 @@
+import numpy as np
+
+import utils
+from discount import DiscountCurve
+from utils import N_YEARS
+
+# Cash-flow components; each lane's cash flows are coefficients (one per
+# component) times a per-year schedule, so a (lanes x years) matrix is
+# coefficients @ schedules and its NPV is coefficients @ (schedules @ discount)
+COMPONENTS = ("benefit", "opex", "other_capex", "hw_capex")
+
+# Discounted schedules kept per model before the cache is emptied
+_DISCOUNTED_CACHE_SIZE = 64
+
+
+def ramp_curve(years_to_full=0, n_years=N_YEARS, shape="linear"):
+    """Share of full benefit reached in each year 0..n_years (year 0 is always 0)
+
+    shape is "linear" (straight line to 1 over years_to_full years) or
+    "logistic" (S-curve centred at years_to_full / 2); years_to_full=0 gives
+    the flat model.
+    """
+    t = np.arange(n_years + 1, dtype=float)
+    if years_to_full <= 0:
+        curve = np.ones_like(t)
+    elif shape == "linear":
+        curve = np.minimum(t / years_to_full, 1.0)
+    elif shape == "logistic":
+        curve = 1 / (1 + np.exp(-10 * (t / years_to_full - 0.5)))
+        curve = np.where(t >= years_to_full, 1.0, curve)
+    else:
+        raise ValueError(f"Unknown ramp shape '{shape}'. Choose 'linear' or 'logistic'")
+    curve[0] = 0.0
+    return curve
+
+
+def discount_matrix(rates, n_years=N_YEARS):
+    """(years + 1, rates) matrix of discount factors (1 + r)^-t, or of each curve in a DiscountCurve family"""
+    if isinstance(rates, DiscountCurve):
+        return rates.factors(n_years).reshape(-1, n_years + 1).T
+    t = np.arange(n_years + 1, dtype=float)[:, None]
+    return (1 + np.atleast_1d(np.asarray(rates, dtype=float))[None, :]) ** -t
+
+
+class CashFlowModel:
+    """Year-by-year cash flows with benefit ramp-up, hardware refresh cycles and residual value
+
+    ramp: benefit share per year 0..n_years (see ramp_curve); None is flat.
+    refresh_years: the hardware share of CAPEX (scaled by the hardware factor)
+    is bought again every refresh_years; None means bought once at t=0.
+    residual_value: credit the undepreciated (straight-line) value of the last
+    hardware purchase in the final year.
+    """
+
+    def __init__(self, n_years=N_YEARS, ramp=None, refresh_years=None, residual_value=True):
+        self.n_years = n_years
+        self.ramp = ramp_curve(0, n_years) if ramp is None else np.asarray(ramp, dtype=float)
+        if len(self.ramp) != n_years + 1:
+            raise ValueError(f"ramp must have n_years + 1 = {n_years + 1} entries")
+        self.refresh_years = refresh_years
+        self.residual_value = residual_value
+        self.schedules = self._schedules()
+        self._discounted = {}
+
+    def _schedules(self):
+        """(components, years + 1) matrix of signed per-unit cash flows"""
+        n = self.n_years
+        schedules = np.zeros((len(COMPONENTS), n + 1))
+        schedules[0, 1:] = self.ramp[1:]  # Benefit
+        schedules[1, 1:] = -1.0           # Opex
+        schedules[2, 0] = -1.0            # Non-hardware CAPEX
+
+        purchases = [0] if not self.refresh_years else list(range(0, n, self.refresh_years))
+        schedules[3, purchases] = -1.0
+        if self.residual_value and self.refresh_years:
+            # Straight-line value left on the last purchase at the horizon
+            schedules[3, n] += 1 - (n - purchases[-1]) / self.refresh_years
+        return schedules
+
+    def discounted_schedules(self, rates):
+        """schedules @ discount_matrix(rates), cached per rate vector or curve"""
+        if isinstance(rates, DiscountCurve):
+            key = (rates.year_rates.shape, rates.year_rates.tobytes())
+        else:
+            rates = np.atleast_1d(np.asarray(rates, dtype=float))
+            key = rates.tobytes()
+        if key not in self._discounted:
+            if len(self._discounted) >= _DISCOUNTED_CACHE_SIZE:
+                self._discounted.clear()  # Bound memory for long-running callers sweeping many rates
+            self._discounted[key] = self.schedules @ discount_matrix(rates, self.n_years)
+        return self._discounted[key]
+
+    def coefficients(self, macro, uptake, comp, hw):
+        """(lanes, components) amounts per lane for a project and arrays of uptake/compliance/hardware"""
+        project = utils.get_project(macro)
+        uptake, comp, hw = np.broadcast_arrays(*(np.atleast_1d(np.asarray(x, dtype=float))
+                                                 for x in (uptake, comp, hw)))
+        coefficients = np.empty((uptake.size, len(COMPONENTS)))
+        coefficients[:, 0] = project["benefit"] * (uptake * comp).ravel()
+        coefficients[:, 1] = project["opex"]
+        coefficients[:, 2] = project["capex"] * (1 - project["hw_share"])
+        coefficients[:, 3] = project["capex"] * project["hw_share"] * hw.ravel()
+        return coefficients
+
+    def cash_flows(self, macro, uptake, comp, hw):
+        """(lanes, years + 1) matrix of net cash flows, column 0 being t=0"""
+        return self.coefficients(macro, uptake, comp, hw) @ self.schedules
+
+    def npv(self, macro, uptake, comp, hw, rates=0.008):
+        """NPV in € millions, shape (lanes, rates); one matrix multiply against cached discounted schedules"""
+        return self.coefficients(macro, uptake, comp, hw) @ self.discounted_schedules(rates) / 1e6
+
+    def irr(self, macro, uptake, comp, hw):
+        """IRR per lane from the cash-flow matrix: (rates, converged, iterations)"""
+        return utils.irr_array(cashflows=self.cash_flows(macro, uptake, comp, hw))
+
+    def monte_carlo(self, n_samples=10000, seed=0, rates=0.008):
+        """NPV arrays (samples, rates) for both projects, using the same draws as monte_carlo_arrays"""
+        n_rates = self.discounted_schedules(rates).shape[1]
+        npv_m1 = np.empty((n_samples, n_rates))
+        npv_m2 = np.empty((n_samples, n_rates))
+        offset = 0
+        for block, size in enumerate(utils.block_sizes(n_samples)):
+            uptake, compliance, hw_factor = utils.sample_parameters(utils.block_rng(seed, block), size)
+            npv_m1[offset:offset + size] = self.npv("MACRO1", uptake, compliance, hw_factor, rates)
+            npv_m2[offset:offset + size] = self.npv("MACRO2", uptake, compliance, hw_factor, rates)
+            offset += size
+        return npv_m1, npv_m2
@@ -0,0 +1,172 @@
+"""Headless model results for batch use.
+
+    python compute.py [--format json|csv] [--section NAME ...] [--mc-samples N] [--seed S] [--bootstrap N]
+    python compute.py --charts [CHART ...]
+
+Prints scenario NPVs, tornado swings, break-even thresholds, Monte Carlo
+summaries (with bootstrap confidence intervals given --bootstrap N) and, with
+--section tail_risk, importance-sampled tail risk without importing
+matplotlib, seaborn or pandas; only --charts loads the plotting stack (through
+main).
+"""
+import argparse
+import csv
+import json
+import sys
+
+import numpy as np
+
+import break_even
+import utils
+
+MC_QUANTILES = (0.05, 0.5, 0.95)
+
+
+def scenario_results(projects=None):
+    """{project: {scenario: {"npv", "bcr", "irr"}}} at the base 0.8% rate"""
+    result = utils.evaluate_portfolio(projects, rates=[0.008])
+    return {
+        key: {
+            scenario: {
+                "npv": result["npv"][p, s, 0].item(),
+                "bcr": result["bcr"][p, s, 0].item(),
+                "irr": result["irr"][p, s].item()
+            }
+            for s, scenario in enumerate(result["scenarios"])
+        }
+        for p, key in enumerate(result["projects"])
+    }
+
+
+def tornado_results(projects=None):
+    """{project: {"base": NPV, parameter: {"low", "high"}}} of one-at-a-time swings"""
+    swings, base = utils.tornado_data(projects)
+    return {
+        key: {"base": base[key], **{param: {"low": low, "high": high}
+                                    for param, (low, high) in params.items()}}
+        for key, params in swings.items()
+    }
+
+
+def break_even_results(projects=None):
+    """{project: {rate label: {"adoption", "hardware"}}} break-even multipliers per discount rate"""
+    projects = projects or utils.PROJECTS
+    labels = list(utils.RATES)
+    rates = np.array([utils.RATES[label] for label in labels])
+    adoption = break_even.adoption_threshold(rates, projects=projects)
+    hardware = break_even.hardware_threshold(rates, projects=projects)
+    return {
+        key: {label: {"adoption": adoption[p, r].item(), "hardware": hardware[p, r].item()}
+              for r, label in enumerate(labels)}
+        for p, key in enumerate(projects.keys)
+    }
+
+
+def summarize_samples(values, n_boot=0, level=0.95, seed=0):
+    """Mean, standard deviation, quantiles and P(NPV < 0) of one sample array
+
+    With n_boot > 0, "ci" adds percentile bootstrap intervals
+    {statistic: {"low", "high", "std_error"}} for the mean, p5, p95 and
+    prob_negative (see bootstrap.bootstrap_intervals).
+    """
+    quantiles = np.quantile(values, MC_QUANTILES)
+    summary = {
+        "mean": values.mean().item(),
+        "std": values.std(ddof=1).item(),
+        **{f"p{round(q * 100)}": v.item() for q, v in zip(MC_QUANTILES, quantiles)},
+        "prob_negative": np.mean(values < 0).item()
+    }
+    if n_boot:
+        from bootstrap import bootstrap_intervals
+
+        intervals = bootstrap_intervals(values, n_boot, level, seed)
+        summary["ci"] = {name: {k: v for k, v in interval.items() if k != "estimate"}
+                         for name, interval in intervals.items()}
+        summary["ci_level"] = level
+    return summary
+
+
+def monte_carlo_results(n_samples=10000, seed=0, n_boot=0, level=0.95):
+    """{project: summary} of the Monte Carlo NPV distributions, with bootstrap intervals if n_boot > 0"""
+    npv_m1, npv_m2, _ = utils.monte_carlo_arrays(n_samples, seed)
+    return {"MACRO1": summarize_samples(npv_m1, n_boot, level, seed),
+            "MACRO2": summarize_samples(npv_m2, n_boot, level, seed)}
+
+
+def tail_risk_results(threshold=0.0, n_samples=10000, seed=0):
+    """{project: importance-sampling estimate of P(NPV < threshold)} (see rare_event.tail_probability)"""
+    from rare_event import tail_probability  # Pulls in scipy; only when this section is requested
+
+    results = {}
+    for key in utils.PROJECTS.keys:
+        estimate = tail_probability(key, threshold, n_samples, seed=seed)
+        # JSON has no infinity
+        results[key] = {k: (None if isinstance(v, float) and np.isinf(v) else v) for k, v in estimate.items()
+                        if k not in ("project", "tilt")}
+    return results
+
+
+SECTIONS = {
+    "scenarios": lambda args: scenario_results(),
+    "tornado": lambda args: tornado_results(),
+    "break_even": lambda args: break_even_results(),
+    "monte_carlo": lambda args: monte_carlo_results(args.mc_samples, args.seed, args.bootstrap, args.ci_level),
+    "tail_risk": lambda args: tail_risk_results(args.tail_threshold, args.mc_samples, args.seed),
+}
+
+# Sections run without --section; tail_risk needs scipy (slow to import), so it is opt-in
+DEFAULT_SECTIONS = ["scenarios", "tornado", "break_even", "monte_carlo"]
+
+
+def flatten(results):
+    """Rows of (section, project, key, value) with nested keys joined by '.'"""
+    rows = []
+
+    def walk(section, project, prefix, value):
+        if isinstance(value, dict):
+            for k, v in value.items():
+                walk(section, project, f"{prefix}.{k}" if prefix else k, v)
+        else:
+            rows.append((section, project, prefix, value))
+
+    for section, projects in results.items():
+        for project, values in projects.items():
+            walk(section, project, "", values)
+    return rows
+
+
+def write_results(results, fmt="json", out=sys.stdout):
+    if fmt == "json":
+        json.dump(results, out, indent=2)
+        out.write("\n")
+    else:
+        writer = csv.writer(out)
+        writer.writerow(["section", "project", "key", "value"])
+        writer.writerows(flatten(results))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compute the cost-benefit results without plotting")
+    parser.add_argument('--format', choices=['json', 'csv'], default='json')
+    parser.add_argument('--section', action='append', choices=list(SECTIONS),
+                        help=f"Only this section; repeatable (default: {', '.join(DEFAULT_SECTIONS)})")
+    parser.add_argument('--mc-samples', type=int, default=10000, help="Monte Carlo sample count")
+    parser.add_argument('--seed', type=int, default=0, help="Monte Carlo seed")
+    parser.add_argument('--bootstrap', type=int, default=0, metavar='N',
+                        help="Add Monte Carlo confidence intervals from N bootstrap replicates (default: none)")
+    parser.add_argument('--ci-level', type=float, default=0.95, help="Confidence level of the intervals")
+    parser.add_argument('--tail-threshold', type=float, default=0.0,
+                        help="NPV (€ millions) below which tail_risk estimates the probability")
+    parser.add_argument('--charts', nargs='*', metavar='CHART', default=None,
+                        help="Render charts instead (all, or the given names/prefixes); loads the plotting stack")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.charts is not None:
+        import main
+        main.generate_all_visualizations(only=args.charts or None)
+    else:
+        results = {name: SECTIONS[name](args) for name in (args.section or DEFAULT_SECTIONS)}
+        write_results(results, args.format)
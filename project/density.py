@@ -0,0 +1,107 @@
+import numpy as np
+
+# Fine bins used when binning raw samples; a multiple of PLOT_BINS so the
+# plotting histogram is an exact regrouping of the fine one
+FINE_BINS = 2560
+PLOT_BINS = 40
+KDE_POINTS = 512
+
+
+def binned_quantile(counts, edges, q):
+    """Quantile(s) from histogram counts, interpolated linearly within bins"""
+    cdf = np.concatenate([[0], np.cumsum(counts)]) / counts.sum()
+    return np.interp(q, cdf, edges)
+
+
+def binned_cdf(counts, edges, value):
+    """Fraction of the binned mass below value (inverse of binned_quantile)"""
+    cdf = np.concatenate([[0], np.cumsum(counts)]) / counts.sum()
+    return float(np.interp(value, edges, cdf))
+
+
+def coarsen(counts, edges, bins=PLOT_BINS):
+    """(counts, edges) with groups of fine bins summed into `bins` bins; leftover fine bins join the last one"""
+    group = len(counts) // bins
+    coarse = counts[:group * bins].reshape(bins, group).sum(axis=1)
+    coarse[-1] += counts[group * bins:].sum()
+    return coarse, np.append(edges[:group * bins:group], edges[-1])
+
+
+def binned_kde(counts, edges, bandwidth):
+    """Gaussian KDE (density) at the bin centres: binned counts convolved with the kernel by FFT
+
+    Exact up to moving each sample to its bin centre, at O(bins log bins)
+    cost whatever the sample count.
+    """
+    width = (edges[-1] - edges[0]) / len(counts)
+    half = min(int(np.ceil(4 * bandwidth / width)), len(counts))
+    offsets = np.arange(-half, half + 1) * width
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    kernel /= kernel.sum()
+
+    size = 1 << int(np.ceil(np.log2(len(counts) + 2 * half + 1)))  # Zero-padded: no wrap-around
+    smoothed = np.fft.irfft(np.fft.rfft(counts, size) * np.fft.rfft(kernel, size), size)
+    density = smoothed[half:half + len(counts)] / (counts.sum() * width)
+    return np.maximum(density, 0)  # Drop FFT round-off below zero
+
+
+class DensitySummary:
+    """Fixed-size description of a sample distribution for plotting
+
+    Holds fine histogram counts plus the exact count, mean, standard deviation
+    and NPV<0 fraction. The plotting histogram, Gaussian KDE (Scott's rule
+    bandwidth, FFT on the binned grid) and quantiles are all derived from the
+    counts, so the cost of drawing does not depend on the sample count.
+    """
+
+    def __init__(self, counts, edges, mean, std, prob_negative):
+        self.counts = np.asarray(counts)
+        self.edges = np.asarray(edges, dtype=float)
+        self.n = int(self.counts.sum())
+        self.mean = float(mean)
+        self.std = float(std)
+        self.prob_negative = float(prob_negative)
+
+    @classmethod
+    def from_samples(cls, values, bins=FINE_BINS, pad=1.0):
+        """Bin raw samples once over [min - pad, max + pad]"""
+        values = np.asarray(values, dtype=float)
+        edges = np.linspace(values.min() - pad, values.max() + pad, bins + 1)
+        width = edges[1] - edges[0]
+        idx = np.minimum(((values - edges[0]) / width).astype(np.int64), bins - 1)
+        counts = np.bincount(idx, minlength=bins)
+        return cls(counts, edges, values.mean(), values.std(ddof=1), np.mean(values < 0))
+
+    @classmethod
+    def from_counts(cls, counts, edges, mean=None, std=None, prob_negative=None):
+        """From streamed bin counts; statistics not supplied are estimated from the bins"""
+        counts, edges = np.asarray(counts), np.asarray(edges, dtype=float)
+        centres = (edges[:-1] + edges[1:]) / 2
+        n = counts.sum()
+        if mean is None:
+            mean = centres @ counts / n
+        if std is None:
+            std = np.sqrt(((centres - mean) ** 2) @ counts / (n - 1))
+        if prob_negative is None:
+            prob_negative = binned_cdf(counts, edges, 0.0)
+        return cls(counts, edges, mean, std, prob_negative)
+
+    def bandwidth(self):
+        """Scott's rule, as in scipy.stats.gaussian_kde and seaborn"""
+        return max(self.std * self.n ** -0.2, (self.edges[-1] - self.edges[0]) / len(self.counts))
+
+    def quantile(self, q):
+        return binned_quantile(self.counts, self.edges, q)
+
+    def histogram(self, bins=PLOT_BINS):
+        return coarsen(self.counts, self.edges, bins)
+
+    def kde(self, points=KDE_POINTS, scale="density", bins=PLOT_BINS):
+        """(x, y) KDE curve on `points` points; scale="count" matches a histogram with `bins` bins"""
+        centres = (self.edges[:-1] + self.edges[1:]) / 2
+        density = binned_kde(self.counts, self.edges, self.bandwidth())
+        x = np.linspace(centres[0], centres[-1], points)
+        y = np.interp(x, centres, density)
+        if scale == "count":
+            y *= self.n * (self.edges[-1] - self.edges[0]) / bins
+        return x, y
@@ -0,0 +1,79 @@
+import numpy as np
+
+# HM Treasury Green Book declining schedule: (first year, rate) for the
+# standard 3.5% social time preference rate
+GREEN_BOOK_SCHEDULE = [(1, 0.035), (31, 0.030), (76, 0.025), (126, 0.020), (201, 0.015), (301, 0.010)]
+
+
+class DiscountCurve:
+    """Year-dependent discount rates with cached discount factors
+
+    year_rates has shape (..., years): the rate applying in years 1..years,
+    with the last rate carried on beyond that. Leading dimensions make a family
+    of curves (e.g. 10^4 flat rates or shifts of one curve) that npv/bcr/irr
+    and the scenario functions evaluate in a single vectorized call; their
+    results gain the family's shape as trailing axes, after the inputs' shape.
+    """
+
+    def __init__(self, year_rates):
+        self.year_rates = np.atleast_1d(np.asarray(year_rates, dtype=float))
+        self._factors = {}
+
+    @classmethod
+    def flat(cls, rate):
+        """Constant rate(s); an array of rates gives a family of flat curves"""
+        return cls(np.asarray(rate, dtype=float)[..., None])
+
+    @classmethod
+    def piecewise(cls, schedule, n_years=None):
+        """Step schedule from [(first_year, rate), ...] sorted by first year"""
+        starts = [start for start, _ in schedule]
+        n_years = n_years or max(starts)
+        years = np.arange(1, n_years + 1)
+        idx = np.searchsorted(starts, years, side="right") - 1
+        return cls(np.array([rate for _, rate in schedule])[np.maximum(idx, 0)])
+
+    @classmethod
+    def green_book(cls, n_years=None):
+        """Declining long-term schedule in the style of the HM Treasury Green Book"""
+        return cls.piecewise(GREEN_BOOK_SCHEDULE, n_years)
+
+    @property
+    def shape(self):
+        """Shape of the curve family (() for a single curve)"""
+        return self.year_rates.shape[:-1]
+
+    def rates(self, n):
+        """(..., n) rates for years 1..n"""
+        available = self.year_rates.shape[-1]
+        idx = np.minimum(np.arange(n), available - 1)
+        return self.year_rates[..., idx]
+
+    def factors(self, n):
+        """(..., n + 1) discount factors for years 0..n, cached per horizon"""
+        if n not in self._factors:
+            growth = np.cumprod(1 + self.rates(n), axis=-1)
+            self._factors[n] = np.concatenate([np.ones(self.shape + (1,)), 1 / growth], axis=-1)
+        return self._factors[n]
+
+    def annuity(self, n):
+        """Present value of €1 a year for years 1..n; n may be an array of whole-year horizons
+
+        A curve has one rate per year, so unlike the flat-rate closed form
+        (utils.annuity_factor_array) it has no value for fractional horizons;
+        those raise ValueError rather than being truncated.
+        """
+        n = np.asarray(n)
+        years = np.rint(n).astype(int)
+        if not np.array_equal(years, n) or (years < 0).any():
+            raise ValueError(f"DiscountCurve horizons must be whole, non-negative years (got {n})")
+        cumulative = np.cumsum(self.factors(int(years.max())), axis=-1)
+        return cumulative[..., years] - 1  # Drop the year-0 factor
+
+    def shifted(self, shifts):
+        """Family of curves moved in parallel by each shift; shape shifts.shape + self.shape"""
+        shifts = np.asarray(shifts, dtype=float)
+        return DiscountCurve(self.year_rates + shifts.reshape(shifts.shape + (1,) * self.year_rates.ndim))
+
+    def __repr__(self):
+        return f"DiscountCurve(shape={self.shape}, years={self.year_rates.shape[-1]})"
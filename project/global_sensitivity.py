@@ -0,0 +1,116 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.stats import qmc
+
+import utils
+from monte_carlo_sampling import parameters_from_uniforms
+
+PARAMETER_LABELS = {
+    "Uptake": "Uptake Rate",
+    "Compliance": "Compliance Factor",
+    "HW_Factor": "Hardware Cost Factor"
+}
+
+
+def _evaluate(u):
+    """NPV (€ millions) of every project for (n, 3) uniforms: shape (projects, n)"""
+    uptake, compliance, hw_factor = parameters_from_uniforms(u)
+    return utils.portfolio_npv(uptake, compliance, hw_factor)
+
+
+def evaluate_batched(u, workers=1, chunk_size=2**18):
+    """_evaluate over row chunks, optionally spread across a process pool"""
+    chunks = [u[i:i + chunk_size] for i in range(0, len(u), chunk_size)]
+    if workers == 1 or len(chunks) == 1:
+        return np.concatenate([_evaluate(c) for c in chunks], axis=1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return np.concatenate(list(pool.map(_evaluate, chunks)), axis=1)
+
+
+def saltelli_samples(n, k, seed=0):
+    """Saltelli design: matrices A, B of shape (n, k) and AB of shape (k, n, k), AB[i] = A with column i from B"""
+    base = qmc.Sobol(2 * k, scramble=True, seed=seed).random(n)
+    a, b = base[:, :k], base[:, k:]
+    ab = np.repeat(a[None], k, axis=0)
+    for i in range(k):
+        ab[i, :, i] = b[:, i]
+    return a, b, ab
+
+
+def _indices(f_a, f_b, f_ab):
+    """First-order (Saltelli 2010) and total-order (Jansen) indices
+
+    f_a, f_b have shape (..., n) and f_ab (..., k, n); returns two (..., k) arrays.
+    """
+    variance = np.var(np.concatenate([f_a, f_b], axis=-1), axis=-1)[..., None]
+    first = np.mean(f_b[..., None, :] * (f_ab - f_a[..., None, :]), axis=-1) / variance
+    total = 0.5 * np.mean((f_a[..., None, :] - f_ab) ** 2, axis=-1) / variance
+    return first, total
+
+
+def sobol_indices(n=2**14, seed=0, n_bootstrap=500, confidence=0.95, workers=1, bootstrap_chunk=50):
+    """First- and total-order Sobol indices of NPV for every project
+
+    Uses N * (k + 2) model evaluations on a scrambled Sobol Saltelli design and
+    percentile bootstrap intervals over the N base rows. Returns a dict with
+    "S1", "ST" (projects x parameters), "S1_conf", "ST_conf" (projects x
+    parameters x 2), the parameter and project names and the evaluation count.
+    """
+    names = list(utils.MC_DISTRIBUTIONS)
+    k = len(names)
+    a, b, ab = saltelli_samples(n, k, seed)
+
+    workers = workers or os.cpu_count() or 1
+    f = evaluate_batched(np.concatenate([a, b, ab.reshape(k * n, k)]), workers)
+    f_a, f_b = f[:, :n], f[:, n:2 * n]
+    f_ab = f[:, 2 * n:].reshape(f.shape[0], k, n)
+    first, total = _indices(f_a, f_b, f_ab)
+
+    # Bootstrap: resample base rows in blocks of replicates to bound memory
+    rng = np.random.default_rng(seed)
+    boot_first, boot_total = [], []
+    for start in range(0, n_bootstrap, bootstrap_chunk):
+        idx = rng.integers(0, n, (min(bootstrap_chunk, n_bootstrap - start), n))
+        s1, st = _indices(f_a[:, idx], f_b[:, idx], f_ab[:, :, idx].transpose(0, 2, 1, 3))
+        boot_first.append(s1)
+        boot_total.append(st)
+    alpha = (1 - confidence) / 2
+    quantiles = [alpha, 1 - alpha]
+    s1_conf = np.moveaxis(np.quantile(np.concatenate(boot_first, axis=1), quantiles, axis=1), 0, -1)
+    st_conf = np.moveaxis(np.quantile(np.concatenate(boot_total, axis=1), quantiles, axis=1), 0, -1)
+
+    return {
+        "parameters": names,
+        "projects": list(utils.PROJECTS.keys),
+        "S1": first,
+        "ST": total,
+        "S1_conf": s1_conf,
+        "ST_conf": st_conf,
+        "n_evaluations": n * (k + 2)
+    }
+
+
+_SOBOL_CACHE = {}
+_SOBOL_CACHE_SIZE = 8
+
+
+def cached_sobol_indices(**kwargs):
+    """sobol_indices memoized on its arguments and the model inputs it reads
+
+    One run covers every project, so the per-project charts share it instead
+    of each repeating the Saltelli design and bootstrap.
+    """
+    key = json.dumps({
+        "args": kwargs,
+        "projects": [utils.PROJECTS.row(key) for key in utils.PROJECTS.keys],
+        "distributions": utils.MC_DISTRIBUTIONS,
+        "n_years": utils.N_YEARS
+    }, sort_keys=True, default=repr)
+    if key not in _SOBOL_CACHE:
+        if len(_SOBOL_CACHE) >= _SOBOL_CACHE_SIZE:
+            _SOBOL_CACHE.clear()
+        _SOBOL_CACHE[key] = sobol_indices(**kwargs)
+    return _SOBOL_CACHE[key]
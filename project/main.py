@@ -1,89 +1,183 @@
-import matplotlib.pyplot as plt
+import argparse
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Render headless: must be selected before pyplot is imported anywhere
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
 
-# Create output directory if it doesn't exist
-if not os.path.exists('output'):
-    os.makedirs('output')
+import profiling
+import report_build
+from report_build import project_inputs
 
 # Import visualization modules
 from scenario_charts import (
     plot_scenario_comparison,
     plot_discount_rate_sensitivity,
-    plot_break_even_analysis
+    plot_break_even_analysis,
+    plot_break_even_frontier
 )
-from tornado_analysis import plot_tornado, plot_waterfall_chart
+from tornado_analysis import (plot_tornado, plot_sensitivity_spider, plot_waterfall_chart, plot_sobol_indices,
+                              SOBOL_BOOTSTRAP)
 from monte_carlo_analysis import (
     plot_monte_carlo_distribution_patient,
-    plot_monte_carlo_distribution_hospital)
-
-
-# Set Matplotlib style for consistent, professional look
-plt.style.use('seaborn-whitegrid')
-plt.rcParams.update({
-    'font.family': 'sans-serif',
-    'font.sans-serif': ['Arial', 'DejaVu Sans'],
-    'axes.titlesize': 20,        # Titolo del grafico
-    'axes.labelsize': 18,        # Etichette assi
-    'xtick.labelsize': 16,       # Etichette asse X
-    'ytick.labelsize': 16,       # Etichette asse Y
-    'legend.fontsize': 16,       # Legenda
-    'figure.figsize': (10, 7),
-    'figure.dpi': 100
-})
-
-
-def generate_all_visualizations():
-    """Generate all visualizations and save them to the output directory"""
-    print("Generating sensitivity analysis visualizations...")
-    
-    # 1. Scenario comparison chart
-    fig = plot_scenario_comparison()
-    fig.savefig('output/scenario_comparison.png', dpi=300, bbox_inches='tight')
-    plt.close(fig)
-    print("✓ Scenario comparison chart")
-    
-    # 2. Discount rate sensitivity chart
-    fig = plot_discount_rate_sensitivity()
-    fig.savefig('output/discount_rate_sensitivity.png', dpi=300, bbox_inches='tight')
-    plt.close(fig)
-    print("✓ Discount rate sensitivity chart")
-    
-    # 3. Break-even analysis chart
-    fig = plot_break_even_analysis()
-    fig.savefig('output/break_even_analysis.png', dpi=300, bbox_inches='tight')
-    plt.close(fig)
-    print("✓ Break-even analysis chart")
-    
-    # 4. Tornado diagrams for both projects
-    fig = plot_tornado("MACRO1")
-    fig.savefig('output/tornado_macro1.png', dpi=300, bbox_inches='tight')
-    plt.close(fig)
-    
-    fig = plot_tornado("MACRO2")
-    fig.savefig('output/tornado_macro2.png', dpi=300, bbox_inches='tight')
-    plt.close(fig)
-    print("✓ Tornado diagrams")
+    plot_monte_carlo_distribution_hospital,
+    plot_evppi_by_rate)
+from monte_carlo_cache import cached_monte_carlo
+from utils import MC_SETTINGS, PROJECTS
 
-    
-    # 5. Waterfall charts for both projects
-    fig = plot_waterfall_chart("MACRO1")
-    fig.savefig('output/waterfall_macro1.png', dpi=300, bbox_inches='tight')
-    plt.close(fig)
-    
-    fig = plot_waterfall_chart("MACRO2")
-    fig.savefig('output/waterfall_macro2.png', dpi=300, bbox_inches='tight')
+OUTPUT_DIR = 'output'
+
+# Chart name -> (plot function, arguments); each is saved as output/<name>.png
+CHARTS = {
+    'scenario_comparison': (plot_scenario_comparison, ()),
+    'discount_rate_sensitivity': (plot_discount_rate_sensitivity, ()),
+    'break_even_analysis': (plot_break_even_analysis, ()),
+    'break_even_frontier': (plot_break_even_frontier, ()),
+    **{f'tornado_{key.lower()}': (plot_tornado, (key,)) for key in PROJECTS.keys},
+    'sensitivity_spider': (plot_sensitivity_spider, ()),
+    **{f'sobol_{key.lower()}': (plot_sobol_indices, (key,)) for key in PROJECTS.keys},
+    **{f'waterfall_{key.lower()}': (plot_waterfall_chart, (key,)) for key in PROJECTS.keys},
+    'monte_carlo_patient': (plot_monte_carlo_distribution_patient, ()),
+    'monte_carlo_hospital': (plot_monte_carlo_distribution_hospital, ()),
+    'evppi_by_rate': (plot_evppi_by_rate, ()),
+}
+
+# Chart name -> inputs it depends on (see report_build.input_values); a chart
+# is rebuilt only when one of these, its arguments or the code changes
+_MC_INPUTS = ['N_YEARS', 'MC_DISTRIBUTIONS', 'MC_SETTINGS']
+CHART_INPUTS = {
+    'scenario_comparison': project_inputs() + ['N_YEARS', 'SCENARIOS'],
+    'discount_rate_sensitivity': project_inputs() + ['N_YEARS'],
+    'break_even_analysis': project_inputs() + ['N_YEARS'],
+    'break_even_frontier': project_inputs() + ['N_YEARS', 'RATES'],
+    **{f'tornado_{key.lower()}': project_inputs(key) + ['N_YEARS', 'SENSITIVITY_PARAMETERS'] for key in PROJECTS.keys},
+    'sensitivity_spider': project_inputs() + ['N_YEARS', 'SENSITIVITY_PARAMETERS'],
+    **{f'sobol_{key.lower()}': project_inputs(key) + ['N_YEARS', 'MC_DISTRIBUTIONS'] for key in PROJECTS.keys},
+    **{f'waterfall_{key.lower()}': project_inputs(key) + ['N_YEARS'] for key in PROJECTS.keys},
+    'monte_carlo_patient': project_inputs('MACRO1') + _MC_INPUTS,
+    'monte_carlo_hospital': project_inputs('MACRO2') + _MC_INPUTS,
+    'evppi_by_rate': project_inputs() + ['N_YEARS', 'RATES', 'MC_DISTRIBUTIONS'],
+}
+
+
+def apply_style():
+    """Set Matplotlib style for consistent, professional look"""
+    # The seaborn styles were renamed in Matplotlib 3.6
+    style = 'seaborn-v0_8-whitegrid'
+    plt.style.use(style if style in plt.style.available else 'seaborn-whitegrid')
+    plt.rcParams.update({
+        'font.family': 'sans-serif',
+        'font.sans-serif': ['Arial', 'DejaVu Sans'],
+        'axes.titlesize': 20,        # Titolo del grafico
+        'axes.labelsize': 18,        # Etichette assi
+        'xtick.labelsize': 16,       # Etichette asse X
+        'ytick.labelsize': 16,       # Etichette asse Y
+        'legend.fontsize': 16,       # Legenda
+        'figure.figsize': (10, 7),
+        'figure.dpi': 100
+    })
+
+
+def select_charts(only=None):
+    """Chart names to build; each entry of only is a chart name or a name prefix (e.g. 'tornado')"""
+    if not only:
+        return list(CHARTS)
+    selected = []
+    for pattern in only:
+        matches = [name for name in CHARTS if name == pattern or name.startswith(pattern)]
+        if not matches:
+            raise ValueError(f"Unknown chart '{pattern}'. Choose from: {', '.join(CHARTS)}")
+        selected += [name for name in matches if name not in selected]
+    return selected
+
+
+def render_chart(name):
+    """Build one chart, save it to the output directory and return (name, seconds)"""
+    start = time.perf_counter()
+    plot, args = CHARTS[name]
+    with profiling.stage(f'plot:{name}', 'render'):
+        fig = plot(*args)
+    with profiling.stage(f'savefig:{name}', 'render'):
+        fig.savefig(os.path.join(OUTPUT_DIR, f'{name}.png'), dpi=300, bbox_inches='tight')
     plt.close(fig)
-    print("✓ Waterfall charts")
-    
-    fig1 = plot_monte_carlo_distribution_patient()
-    fig1.savefig("monte_carlo_patient.png", dpi=300, bbox_inches='tight')
-
-    fig2 = plot_monte_carlo_distribution_hospital()
-    fig2.savefig("monte_carlo_hospital.png", dpi=300, bbox_inches='tight')
-    
-    
+    return name, time.perf_counter() - start
+
+
+def generate_all_visualizations(jobs=None, only=None, profile=None, force=False):
+    """Generate all visualizations and save them to the output directory
+
+    Only charts whose declared inputs, arguments or code changed since the
+    last build (or whose output is missing or modified) are rebuilt, unless
+    force is set; output/.build_manifest.json records what was rebuilt and why.
+    profile: path of a Chrome trace-event JSON file; builds serially with
+    stage instrumentation and prints a per-stage summary table.
+    """
+    if profile:
+        with profiling.instrument() as profiler:
+            with profiling.stage('generate_all_visualizations'):
+                generate_all_visualizations(jobs=1, only=only, force=force)
+        profiler.export_chrome_trace(profile)
+        print(f"\n{profiler.format_summary()}")
+        print(f"Trace written to {profile}")
+        return
+
+    print("Generating sensitivity analysis visualizations...")
+    # Create output directory if it doesn't exist
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    rebuild, states = report_build.plan(select_charts(only), CHARTS, CHART_INPUTS, OUTPUT_DIR, force)
+    for name in states:
+        if name not in rebuild:
+            print(f"· {name} (up to date)")
+    names = list(rebuild)
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(names) or 1))
+
+    # Simulate once up front so the Monte Carlo charts share the cached run
+    if any(name.startswith('monte_carlo') for name in names):
+        with profiling.stage('monte_carlo_warmup'):
+            cached_monte_carlo(MC_SETTINGS['n_samples'], MC_SETTINGS['seed'])
+    # Likewise one Sobol run covers every project's chart (forked workers inherit it)
+    if any(name.startswith('sobol') for name in names):
+        from global_sensitivity import cached_sobol_indices  # Pulls in scipy; only when needed
+        with profiling.stage('sobol_warmup'):
+            cached_sobol_indices(n_bootstrap=SOBOL_BOOTSTRAP)
+
+    apply_style()
+    if jobs == 1:
+        results = [render_chart(name) for name in names]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=apply_style) as pool:
+            results = list(pool.map(render_chart, names))
+
+    for name, seconds in results:
+        print(f"✓ {name} ({seconds:.1f}s): {', '.join(rebuild[name])}")
+    report_build.record(rebuild, states, OUTPUT_DIR)
+
     print("\nAll visualizations generated successfully!")
-    print(f"Output files saved to the 'output' directory")
+    print(f"Output files saved to the '{OUTPUT_DIR}' directory")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the cost-benefit sensitivity charts")
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help="Number of charts rendered in parallel (default: all CPU cores)")
+    parser.add_argument('--only', action='append', metavar='CHART',
+                        help=f"Build only this chart or chart prefix; repeatable. Charts: {', '.join(CHARTS)}")
+    parser.add_argument('--force', action='store_true',
+                        help="Rebuild the selected charts even if their inputs are unchanged")
+    parser.add_argument('--profile', metavar='TRACE.json', default=None,
+                        help="Profile a serial build and write a Chrome trace (open in chrome://tracing or Perfetto)")
+    args = parser.parse_args(argv)
+    try:
+        select_charts(args.only)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
 
 if __name__ == "__main__":
-    generate_all_visualizations()
\ No newline at end of file
+    args = parse_args()
+    generate_all_visualizations(jobs=args.jobs, only=args.only, profile=args.profile, force=args.force)
@@ -1,76 +1,161 @@
 import matplotlib.pyplot as plt
 import numpy as np
-import seaborn as sns
-from utils import monte_carlo
+from bootstrap import bootstrap_intervals
+from density import DensitySummary
+from monte_carlo_cache import cached_monte_carlo
+from utils import MC_SETTINGS
 
-def plot_monte_carlo_distribution_patient():
-    """Histogram for Patient-Specific Virtual Care NPV"""
-    results_m1, _, _ = monte_carlo(n_samples=10000)
-    
+# Upper end of the EVPPI rate sweep: beyond it the NPV comparison has no
+# economic meaning for a public investment
+MAX_APPRAISAL_RATE = 0.15
+
+
+def _density(project, summary):
+    """(DensitySummary, bootstrap intervals) of a project's NPV from the cached run
+
+    A StreamingSummary, if given, keeps no samples to resample, so its
+    intervals are None.
+    """
+    if summary is not None:
+        return summary.density(project), None
+    npv_m1, npv_m2, _ = cached_monte_carlo(MC_SETTINGS["n_samples"], MC_SETTINGS["seed"])
+    values = npv_m1 if project == "MACRO1" else npv_m2
+    intervals = bootstrap_intervals(values, MC_SETTINGS["n_boot"], MC_SETTINGS["ci_level"], MC_SETTINGS["seed"])
+    return DensitySummary.from_samples(values), intervals
+
+
+def _npv_distribution(ax, density, color):
+    """Draw the binned NPV histogram with its KDE curve; returns (mean, p5, p95, prob_neg)"""
+    counts, edges = density.histogram()
+    ax.stairs(counts, edges, fill=True, color=color, alpha=0.7)
+    ax.plot(*density.kde(scale="count"), color=color, linewidth=2)
+
+    p5, p95 = density.quantile([0.05, 0.95])
+    return density.mean, p5, p95, density.prob_negative * 100
+
+
+def _ci(intervals, name, scale=1, unit=''):
+    """' (95% CI low–high)' for a statistic, or '' without intervals"""
+    if intervals is None:
+        return ''
+    interval = intervals[name]
+    return f' ({MC_SETTINGS["ci_level"]:.0%} CI {interval["low"] * scale:.1f}–{interval["high"] * scale:.1f}{unit})'
+
+
+def plot_monte_carlo_distribution_patient(summary=None):
+    """Histogram for Patient-Specific Virtual Care NPV (from a StreamingSummary if given)"""
     fig, ax = plt.subplots(figsize=(15, 6))
-    
-    bins = np.linspace(min(results_m1) - 1, max(results_m1) + 1, 40)
-    
-    sns.histplot(results_m1, bins=bins, kde=True, ax=ax, color='#4472C4', alpha=0.7)
-    
-    mean = np.mean(results_m1)
-    p5 = np.percentile(results_m1, 5)
-    p95 = np.percentile(results_m1, 95)
-    prob_neg = np.mean(np.array(results_m1) < 0) * 100
-    
-    ax.axvline(mean, color='black', linestyle='-', linewidth=2, label=f'Mean: €{mean:.1f}m')
-    ax.axvline(p5, color='red', linestyle='--', linewidth=2, label=f'5th percentile: €{p5:.1f}m')
-    ax.axvline(p95, color='green', linestyle='--', linewidth=2, label=f'95th percentile: €{p95:.1f}m')
+
+    density, intervals = _density("MACRO1", summary)
+    mean, p5, p95, prob_neg = _npv_distribution(ax, density, '#4472C4')
+
+    ax.axvline(mean, color='black', linestyle='-', linewidth=2,
+               label=f'Mean: €{mean:.1f}m{_ci(intervals, "mean")}')
+    ax.axvline(p5, color='red', linestyle='--', linewidth=2,
+               label=f'5th percentile: €{p5:.1f}m{_ci(intervals, "p5")}')
+    ax.axvline(p95, color='green', linestyle='--', linewidth=2,
+               label=f'95th percentile: €{p95:.1f}m{_ci(intervals, "p95")}')
     ax.legend(fontsize=27)
 
     ax.axvspan(-20, 0, alpha=0.2, color='red')
-    ax.text(p5 - 0.5, ax.get_ylim()[1] * 0.8, 
-            f'Prob(NPV<0): {prob_neg:.1f}%', 
+    ax.text(p5 - 0.5, ax.get_ylim()[1] * 0.8,
+            f'Prob(NPV<0): {prob_neg:.1f}%{_ci(intervals, "prob_negative", 100, "%")}',
             color='red', fontweight='bold', bbox=dict(facecolor='white', alpha=0.7))
-    
+
     ax.set_title('Monte Carlo Simulation: Patient-Specific Virtual Care', fontsize=19)
     ax.set_xlabel('Net Present Value (€ millions)', fontsize=17)
     ax.set_ylabel('Frequency', fontsize=17)
     ax.legend(loc='upper right')
     ax.grid(True, linestyle='--', alpha=0.3)
-    
+
     for spine in ['top', 'right']:
         ax.spines[spine].set_visible(False)
-    
+
     ax.set_xlim(left=0)
     return fig
 
-def plot_monte_carlo_distribution_hospital():
-    """Histogram for Hospital Simulation Network NPV"""
-    _, results_m2, _ = monte_carlo(n_samples=10000)
-    
+def plot_monte_carlo_distribution_hospital(summary=None):
+    """Histogram for Hospital Simulation Network NPV (from a StreamingSummary if given)"""
     fig, ax = plt.subplots(figsize=(15, 6))
-    
-    bins = np.linspace(min(results_m2) - 1, max(results_m2) + 1, 40)
-    
-    sns.histplot(results_m2, bins=bins, kde=True, ax=ax, color='#ED7D31', alpha=0.7)
-    
-    mean = np.mean(results_m2)
-    p5 = np.percentile(results_m2, 5)
-    p95 = np.percentile(results_m2, 95)
-    prob_neg = np.mean(np.array(results_m2) < 0) * 100
-    
-    ax.axvline(mean, color='black', linestyle='-', linewidth=2, label=f'Mean: €{mean:.1f}m')
-    ax.axvline(p5, color='red', linestyle='--', linewidth=2, label=f'5th percentile: €{p5:.1f}m')
-    ax.axvline(p95, color='green', linestyle='--', linewidth=2, label=f'95th percentile: €{p95:.1f}m')
+
+    density, intervals = _density("MACRO2", summary)
+    mean, p5, p95, prob_neg = _npv_distribution(ax, density, '#ED7D31')
+
+    ax.axvline(mean, color='black', linestyle='-', linewidth=2,
+               label=f'Mean: €{mean:.1f}m{_ci(intervals, "mean")}')
+    ax.axvline(p5, color='red', linestyle='--', linewidth=2,
+               label=f'5th percentile: €{p5:.1f}m{_ci(intervals, "p5")}')
+    ax.axvline(p95, color='green', linestyle='--', linewidth=2,
+               label=f'95th percentile: €{p95:.1f}m{_ci(intervals, "p95")}')
     ax.legend(fontsize=27)
     ax.axvspan(-20, 0, alpha=0.2, color='red')
-    ax.text(p5 - 0.5, ax.get_ylim()[1] * 0.8, 
-            f'Prob(NPV<0): {prob_neg:.1f}%', 
+    ax.text(p5 - 0.5, ax.get_ylim()[1] * 0.8,
+            f'Prob(NPV<0): {prob_neg:.1f}%{_ci(intervals, "prob_negative", 100, "%")}',
             color='red', fontweight='bold', bbox=dict(facecolor='white', alpha=0.7))
-    
+
     ax.set_title('Monte Carlo Simulation: Hospital Simulation Network', fontsize=14)
     ax.set_xlabel('Net Present Value (€ millions)', fontsize=12)
     ax.set_ylabel('Frequency', fontsize=12)
     ax.legend(loc='upper right')
     ax.grid(True, linestyle='--', alpha=0.3)
-    
+
     for spine in ['top', 'right']:
         ax.spines[spine].set_visible(False)
     ax.set_xlim(left=0)
     return fig
+
+
+def plot_evppi_by_rate():
+    """Create line chart of EVPI and per-parameter EVPPI for the project choice against discount rate"""
+    from global_sensitivity import PARAMETER_LABELS
+    from utils import RATES
+    from value_of_information import value_of_information
+
+    # Sweep the range of discount rates an appraisal could defend; the policy
+    # rates themselves are grid points
+    policy_rates = np.array(list(RATES.values()))
+    rates = np.union1d(np.linspace(0, MAX_APPRAISAL_RATE, 61), policy_rates)
+    results = value_of_information(n_samples=200_000, rates=rates)
+    at_policy = np.searchsorted(rates, policy_rates)
+
+    fig, ax = plt.subplots(figsize=(12, 7))
+
+    ax.plot(rates * 100, results["evpi"], color='black', linewidth=2.5, label='EVPI (all parameters)')
+    colors = ['#4472C4', '#70AD47', '#ED7D31']
+    for i, name in enumerate(results["parameters"]):
+        ax.plot(rates * 100, results["evppi"][i], color=colors[i % len(colors)], linewidth=2,
+                linestyle='--', label=f'EVPPI: {PARAMETER_LABELS[name]}')
+
+    # Policy discount rates
+    for rate in RATES.values():
+        ax.axvline(rate * 100, color='grey', linestyle=':', linewidth=1)
+    ax.text(max(RATES.values()) * 100 + 0.3, 0.5, 'Policy rates (0.8% - 5.7%)', transform=ax.get_xaxis_transform(),
+            rotation=90, va='center', fontsize=10, color='grey')
+
+    ax.set_title('Value of Information for the Project Choice', fontsize=14, pad=20)
+    ax.set_xlabel('Discount Rate (%)', fontsize=12)
+    ax.set_ylabel('Expected value of information (€ millions)', fontsize=12)
+    ax.set_xlim(0, rates[-1] * 100)
+    ax.set_ylim(bottom=0)
+    ax.legend(loc='center left', bbox_to_anchor=(0.08, 0.6), fontsize=10)
+    ax.grid(True, linestyle='--', alpha=0.3)
+
+    for spine in ['top', 'right']:
+        ax.spines[spine].set_visible(False)
+
+    # Add explanatory text
+    policy_best = [results["best"][i] for i in at_policy]
+    best = (f"{policy_best[0]} at every policy rate" if len(set(policy_best)) == 1 else
+            ", ".join(f"{choice} at {label}" for choice, label in zip(policy_best, RATES)))
+    if results["evpi"].max() == 0:
+        certainty = (f"EVPI is zero at every rate from 0% to {MAX_APPRAISAL_RATE:.0%}: "
+                     f"no information about the inputs could change the choice.\n")
+    else:
+        certainty = f"EVPI at policy rates: at most €{results['evpi'][at_policy].max():.3f}m.\n"
+    footnote = (f"Choice: project with the highest expected NPV ({best}). {certainty}"
+                "EVPPI from a cubic-spline regression metamodel on 200,000 Monte Carlo samples.")
+    fig.text(0.1, 0.01, footnote, fontsize=9, va='bottom', ha='left')
+
+    plt.tight_layout(rect=[0, 0.07, 1, 0.98])
+
+    return fig
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+import utils
+
+# Bump when the simulation changes in a way the key does not capture
+CACHE_VERSION = 1
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".mc_cache")
+
+
+def cache_key(n_samples, seed, **extra):
+    """Content hash of everything that determines a Monte Carlo run"""
+    spec = {
+        "version": CACHE_VERSION,
+        "n_samples": int(n_samples),
+        "seed": seed,
+        "block_size": utils.MC_BLOCK_SIZE,
+        "distributions": utils.MC_DISTRIBUTIONS,
+        "projects": [utils.PROJECTS.row(key) for key in utils.PROJECTS.keys],
+        "n_years": utils.N_YEARS,
+        "extra": extra
+    }
+    payload = json.dumps(spec, sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class MonteCarloCache:
+    """Two-level (memory + .npz on disk) cache of Monte Carlo arrays with size-based LRU eviction"""
+
+    def __init__(self, directory=CACHE_DIR, max_memory_bytes=256 * 2**20, max_disk_bytes=2 * 2**30):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        """Return the cached dict of arrays for key, or None"""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return self._memory[key]
+
+        path = self._path(key)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+            os.utime(path)  # Mark as recently used for disk eviction
+            self._remember(key, arrays)
+            self.hits += 1
+            return arrays
+
+        self.misses += 1
+        return None
+
+    def put(self, key, arrays):
+        """Store a dict of arrays in memory and on disk"""
+        self._remember(key, arrays)
+
+        os.makedirs(self.directory, exist_ok=True)
+        # A unique temp name, so processes writing the same key never share one
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f"{key}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._evict_disk()
+
+    def clear(self):
+        """Drop all in-memory and on-disk entries"""
+        self._memory.clear()
+        self._memory_bytes = 0
+        for path, _, _ in self._disk_entries():
+            os.remove(path)
+
+    def _remember(self, key, arrays):
+        if key in self._memory:
+            self._memory_bytes -= sum(a.nbytes for a in self._memory.pop(key).values())
+        for a in arrays.values():
+            a.setflags(write=False)  # Entries are shared between callers
+        size = sum(a.nbytes for a in arrays.values())
+        if size > self.max_memory_bytes:
+            return
+        self._memory[key] = arrays
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, old = self._memory.popitem(last=False)
+            self._memory_bytes -= sum(a.nbytes for a in old.values())
+
+    def _disk_entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _evict_disk(self):
+        entries = sorted(self._disk_entries(), key=lambda e: e[1])
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+
+DEFAULT_CACHE = MonteCarloCache()
+
+
+def cached_monte_carlo(n_samples=10000, seed=0, cache=DEFAULT_CACHE):
+    """monte_carlo_arrays with results reused across calls and processes"""
+    key = cache_key(n_samples, seed)
+    arrays = cache.get(key)
+    if arrays is None:
+        npv_m1, npv_m2, parameters = utils.monte_carlo_arrays(n_samples, seed)
+        arrays = {"npv_m1": npv_m1, "npv_m2": npv_m2, "parameters": parameters}
+        cache.put(key, arrays)
+    return arrays["npv_m1"], arrays["npv_m2"], arrays["parameters"]
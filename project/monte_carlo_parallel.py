@@ -0,0 +1,111 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import utils
+from monte_carlo_stream import (StreamingSummary, chunk_data, chunk_moments,
+                                monte_carlo_stream)
+
+
+def _block_ranges(n_blocks, workers):
+    """Split block indices into one contiguous range per worker"""
+    bounds = np.linspace(0, n_blocks, min(workers, n_blocks) + 1).astype(int)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _timing(worker, start, stop, n_samples, wall, cpu):
+    sizes = utils.block_sizes(n_samples)[start:stop]
+    samples = int(sum(sizes))
+    return {
+        "worker": worker,
+        "pid": os.getpid(),
+        "blocks": (int(start), int(stop)),
+        "samples": samples,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "samples_per_s": samples / wall if wall > 0 else float("inf")
+    }
+
+
+def _simulate_blocks(args):
+    """Worker: raw samples for blocks [start, stop)"""
+    worker, n_samples, seed, start, stop = args
+    wall, cpu = time.perf_counter(), time.process_time()
+    chunks = list(monte_carlo_stream(n_samples, seed, start, stop))
+    npv_m1, npv_m2, parameters = (np.concatenate(parts) for parts in zip(*chunks))
+    timing = _timing(worker, start, stop, n_samples,
+                     time.perf_counter() - wall, time.process_time() - cpu)
+    return npv_m1, npv_m2, parameters, timing
+
+
+def _summarize_blocks(args):
+    """Worker: per-block moments plus summed counts for blocks [start, stop)"""
+    worker, n_samples, seed, start, stop = args
+    wall, cpu = time.perf_counter(), time.process_time()
+    summary = StreamingSummary()
+    moments = []
+    for chunk in monte_carlo_stream(n_samples, seed, start, stop):
+        data = chunk_data(*chunk)
+        moments.append(chunk_moments(data))
+        summary.add_counts(data)
+    timing = _timing(worker, start, stop, n_samples,
+                     time.perf_counter() - wall, time.process_time() - cpu)
+    return moments, summary, timing
+
+
+def _run(task, n_samples, seed, workers):
+    workers = workers or os.cpu_count() or 1
+    ranges = _block_ranges(len(utils.block_sizes(n_samples)), workers)
+    tasks = [(i, n_samples, seed, start, stop) for i, (start, stop) in enumerate(ranges)]
+
+    wall = time.perf_counter()
+    if len(tasks) <= 1:
+        results = [task(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=len(tasks)) as pool:
+            results = list(pool.map(task, tasks))
+    wall = time.perf_counter() - wall
+
+    timings = [r[-1] for r in results]
+    report = {
+        "workers": len(tasks),
+        "n_samples": n_samples,
+        "wall_s": wall,
+        "samples_per_s": n_samples / wall if wall > 0 else float("inf"),
+        "per_worker": timings
+    }
+    return results, report
+
+
+def parallel_monte_carlo(n_samples=10000, seed=0, workers=None):
+    """monte_carlo_arrays split across a process pool: returns (npv_m1, npv_m2, parameters, report)
+
+    Every sample block has its own seed stream, so the result is bit-identical
+    to monte_carlo_arrays(n_samples, seed) whatever the number of workers.
+    """
+    if n_samples == 0:
+        return utils.monte_carlo_arrays(0, seed) + ({"workers": 0, "per_worker": []},)
+    results, report = _run(_simulate_blocks, n_samples, seed, workers)
+    npv_m1 = np.concatenate([r[0] for r in results])
+    npv_m2 = np.concatenate([r[1] for r in results])
+    parameters = np.concatenate([r[2] for r in results])
+    return npv_m1, npv_m2, parameters, report
+
+
+def parallel_stream_summary(n_samples, seed=0, workers=None):
+    """stream_summary split across a process pool: returns (summary, report)
+
+    Block moments are merged in block order, so the summary is bit-identical
+    to stream_summary(n_samples, seed) whatever the number of workers.
+    """
+    summary = StreamingSummary()
+    if n_samples == 0:
+        return summary, {"workers": 0, "per_worker": []}
+    results, report = _run(_summarize_blocks, n_samples, seed, workers)
+    for moments, partial, _ in results:
+        for block_moments in moments:
+            summary.merge_moments(*block_moments)
+        summary.merge_counts(partial)
+    return summary, report
@@ -0,0 +1,130 @@
+import numpy as np
+from scipy import stats
+from scipy.special import ndtri
+from scipy.stats import qmc
+
+import utils
+
+METHODS = ("random", "sobol", "lhs", "antithetic")
+N_PARAMS = len(utils.MC_DISTRIBUTIONS)
+
+
+def parameters_from_uniforms(u):
+    """Map (n, 3) uniforms in [0, 1) to Uptake, Compliance, HW_Factor via their inverse CDFs"""
+    params = []
+    for i, spec in enumerate(utils.MC_DISTRIBUTIONS.values()):
+        ui = u[:, i]
+        if spec[0] == "triangular":
+            left, mode, right = spec[1:]
+            split = (mode - left) / (right - left)
+            lower = left + np.sqrt(ui * (right - left) * (mode - left))
+            upper = right - np.sqrt((1 - ui) * (right - left) * (right - mode))
+            params.append(np.where(ui < split, lower, upper))
+        else:
+            mean, std, low, high = spec[1:]
+            params.append(np.clip(mean + std * ndtri(ui), low, high))
+    return params
+
+
+class UniformSampler:
+    """Extendable stream of (n, 3) uniforms for one sampling strategy
+
+    sobol: scrambled Sobol points (balanced when the running total is a power of 2)
+    lhs: each call returns a fresh Latin hypercube of the requested size
+    antithetic: each call returns n // 2 pseudo-random points followed by their mirrors 1 - u
+    (plus one unpaired point when n is odd)
+    random: plain pseudo-random points
+    """
+
+    def __init__(self, method="sobol", seed=0):
+        if method not in METHODS:
+            raise ValueError(f"Unknown sampling method '{method}'. Choose from: {', '.join(METHODS)}")
+        self.method = method
+        self.rng = np.random.default_rng(seed)
+        if method == "sobol":
+            self.engine = qmc.Sobol(N_PARAMS, scramble=True, seed=self.rng)
+
+    def draw(self, n):
+        if self.method == "sobol":
+            return self.engine.random(n)
+        if self.method == "lhs":
+            strata = np.argsort(self.rng.random((N_PARAMS, n)), axis=1).T
+            return (strata + self.rng.random((n, N_PARAMS))) / n
+        if self.method == "antithetic":
+            # An odd n gets one extra unpaired draw so exactly n points come back
+            half = self.rng.random((n // 2, N_PARAMS))
+            return np.concatenate([half, 1 - half, self.rng.random((n % 2, N_PARAMS))])
+        return self.rng.random((n, N_PARAMS))
+
+
+def evaluate(u):
+    """NPVs of both projects (€ millions) and the (n, 3) parameter matrix for given uniforms"""
+    uptake, compliance, hw_factor = parameters_from_uniforms(u)
+    npv_m1 = utils.scenario_npv_array("MACRO1", uptake, compliance, hw_factor)
+    npv_m2 = utils.scenario_npv_array("MACRO2", uptake, compliance, hw_factor)
+    return npv_m1, npv_m2, np.column_stack([uptake, compliance, hw_factor])
+
+
+def sample_monte_carlo(n_samples=4096, method="sobol", seed=0):
+    """Monte Carlo with a chosen sampling strategy: returns (npv_m1, npv_m2, parameters)"""
+    return evaluate(UniformSampler(method, seed).draw(n_samples))
+
+
+def _estimates(npv):
+    """Mean, P5 and P(NPV<0) of each row of an (replicates, n) array"""
+    return {
+        "mean": npv.mean(axis=1),
+        "p5": np.percentile(npv, 5, axis=1),
+        "prob_neg": np.mean(npv < 0, axis=1)
+    }
+
+
+def adaptive_monte_carlo(method="sobol", tol_mean=0.05, tol_p5=0.1, tol_prob_neg=0.005,
+                         confidence=0.95, replicates=16, initial=256, max_samples=2**22, seed=0):
+    """Grow the sample until the CI half-widths of mean NPV, P5 and P(NPV<0) meet the tolerances
+
+    The sample is split into independent replicates (independent scramblings for
+    Sobol), each doubled in size per round; the estimate is the replicate average
+    and its half-width is the Student-t interval over the replicates. Tolerances
+    are in € millions (probability for tol_prob_neg) and apply to both projects.
+
+    Returns a dict with the final estimates and half-widths per project, the
+    number of samples used, whether the tolerances were met, and the path of
+    every round.
+    """
+    tolerances = {"mean": tol_mean, "p5": tol_p5, "prob_neg": tol_prob_neg}
+    t_crit = stats.t.ppf(0.5 + confidence / 2, replicates - 1)
+    seeds = np.random.SeedSequence(seed).spawn(replicates)
+    samplers = [UniformSampler(method, s) for s in seeds]
+
+    npvs = {"MACRO1": np.empty((replicates, 0)), "MACRO2": np.empty((replicates, 0))}
+    path = []
+    n_new = initial
+    while True:
+        batches = [evaluate(sampler.draw(n_new)) for sampler in samplers]
+        npvs["MACRO1"] = np.hstack([npvs["MACRO1"], np.array([b[0] for b in batches])])
+        npvs["MACRO2"] = np.hstack([npvs["MACRO2"], np.array([b[1] for b in batches])])
+
+        step = {"n_samples": npvs["MACRO1"].size, "estimates": {}, "half_widths": {}}
+        converged = True
+        for project, npv in npvs.items():
+            per_replicate = _estimates(npv)
+            step["estimates"][project] = {k: float(v.mean()) for k, v in per_replicate.items()}
+            step["half_widths"][project] = {
+                k: float(t_crit * v.std(ddof=1) / np.sqrt(replicates)) for k, v in per_replicate.items()
+            }
+            converged &= all(step["half_widths"][project][k] <= tol for k, tol in tolerances.items())
+        path.append(step)
+
+        if converged or 2 * step["n_samples"] > max_samples:
+            break
+        n_new = npvs["MACRO1"].shape[1]  # Double each replicate
+
+    return {
+        "method": method,
+        "n_samples": step["n_samples"],
+        "converged": bool(converged),
+        "estimates": step["estimates"],
+        "half_widths": step["half_widths"],
+        "path": path
+    }
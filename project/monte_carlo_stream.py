@@ -0,0 +1,154 @@
+import numpy as np
+
+import utils
+from density import DensitySummary, binned_quantile, coarsen
+
+COLUMNS = list(utils.MC_DISTRIBUTIONS) + ["NPV_M1", "NPV_M2"]
+PROJECTS = {"MACRO1": 3, "MACRO2": 4}  # Column of each project's NPV
+
+# Fine histogram resolution; quantiles are interpolated within these bins and
+# plotting histograms are made by summing groups of them
+FINE_BINS = 16_000
+
+
+def parameter_bounds():
+    """(low, high) support of each Monte Carlo parameter"""
+    bounds = []
+    for spec in utils.MC_DISTRIBUTIONS.values():
+        if spec[0] == "triangular":
+            bounds.append((spec[1], spec[3]))
+        else:
+            bounds.append((spec[3], spec[4]))
+    return bounds
+
+
+def npv_bounds(macro):
+    """Smallest and largest NPV reachable over the parameter support (€ millions)"""
+    (up_lo, up_hi), (comp_lo, comp_hi), (hw_lo, hw_hi) = parameter_bounds()
+    # NPV rises with uptake and compliance and falls with hardware cost
+    low = utils.scenario_npv(macro, up_lo, comp_lo, hw_hi)
+    high = utils.scenario_npv(macro, up_hi, comp_hi, hw_lo)
+    return low, high
+
+
+def monte_carlo_stream(n_samples, seed=0, start_block=0, stop_block=None):
+    """Yield (npv_m1, npv_m2, parameters) block by block; same samples as monte_carlo_arrays"""
+    sizes = utils.block_sizes(n_samples)
+    for block in range(start_block, len(sizes) if stop_block is None else stop_block):
+        yield utils.monte_carlo_block(seed, block, sizes[block])
+
+
+def chunk_data(npv_m1, npv_m2, parameters):
+    """Stack a chunk into a (n, len(COLUMNS)) matrix"""
+    return np.column_stack([parameters, npv_m1, npv_m2])
+
+
+def chunk_moments(data):
+    """(count, column means, co-moment matrix) of one chunk"""
+    mean = data.mean(axis=0)
+    centered = data - mean
+    return len(data), mean, centered.T @ centered
+
+
+class StreamingSummary:
+    """Constant-memory aggregates of a Monte Carlo run, updated one chunk at a time
+
+    Tracks running means and the co-moment matrix of parameters and NPVs
+    (merged with Chan's parallel update), min/max, counts of NPV < 0 and a
+    fixed fine-binned histogram of each project's NPV over its reachable range.
+    """
+
+    def __init__(self, fine_bins=FINE_BINS):
+        k = len(COLUMNS)
+        self.count = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+        self.minimum = np.full(k, np.inf)
+        self.maximum = np.full(k, -np.inf)
+        self.negative = np.zeros(len(PROJECTS), dtype=np.int64)
+        self.edges = {p: np.linspace(*npv_bounds(p), fine_bins + 1) for p in PROJECTS}
+        self.counts = {p: np.zeros(fine_bins, dtype=np.int64) for p in PROJECTS}
+
+    def update(self, npv_m1, npv_m2, parameters):
+        """Fold one chunk of samples into the aggregates"""
+        data = chunk_data(npv_m1, npv_m2, parameters)
+        if len(data):
+            self.merge_moments(*chunk_moments(data))
+            self.add_counts(data)
+        return self
+
+    def add_counts(self, data):
+        """Add a chunk to the min/max, NPV<0 counts and histograms (order-independent parts)"""
+        self.minimum = np.minimum(self.minimum, data.min(axis=0))
+        self.maximum = np.maximum(self.maximum, data.max(axis=0))
+        for i, (project, col) in enumerate(PROJECTS.items()):
+            values = data[:, col]
+            self.negative[i] += np.count_nonzero(values < 0)
+            edges = self.edges[project]
+            width = (edges[-1] - edges[0]) / (len(edges) - 1)
+            idx = np.clip(((values - edges[0]) / width).astype(np.int64), 0, len(edges) - 2)
+            self.counts[project] += np.bincount(idx, minlength=len(edges) - 1)
+
+    def merge_counts(self, other):
+        """Add another summary's min/max, NPV<0 counts and histograms"""
+        self.minimum = np.minimum(self.minimum, other.minimum)
+        self.maximum = np.maximum(self.maximum, other.maximum)
+        self.negative += other.negative
+        for project in PROJECTS:
+            self.counts[project] += other.counts[project]
+
+    def merge(self, other):
+        """Combine with a summary built from a disjoint set of samples"""
+        if other.count:
+            self.merge_moments(other.count, other.mean, other.comoment)
+            self.merge_counts(other)
+        return self
+
+    def merge_moments(self, n, mean, comoment):
+        """Chan's update of count, means and co-moment matrix with another group's moments"""
+        total = self.count + n
+        delta = mean - self.mean
+        self.comoment = self.comoment + comoment + np.outer(delta, delta) * self.count * n / total
+        self.mean = self.mean + delta * n / total
+        self.count = total
+
+    def variance(self):
+        """Sample variance of each column"""
+        return np.diag(self.comoment) / (self.count - 1)
+
+    def std(self):
+        return np.sqrt(self.variance())
+
+    def correlations(self):
+        """Pearson correlation matrix between all columns (ordered as COLUMNS)"""
+        scale = np.sqrt(np.diag(self.comoment))
+        return self.comoment / np.outer(scale, scale)
+
+    def npv_mean(self, project):
+        return self.mean[PROJECTS[project]]
+
+    def prob_negative(self, project):
+        """Fraction of samples with NPV < 0"""
+        return self.negative[list(PROJECTS).index(project)] / self.count
+
+    def quantile(self, project, q):
+        """Quantile(s) of NPV, interpolated linearly within the fine histogram bins"""
+        return binned_quantile(self.counts[project], self.edges[project], q)
+
+    def histogram(self, project, bins=40):
+        """Coarse (counts, edges) for plotting, made by summing groups of fine bins"""
+        return coarsen(self.counts[project], self.edges[project], bins)
+
+    def density(self, project):
+        """DensitySummary (histogram, KDE, quantiles) of a project's NPV from the streamed bins"""
+        return DensitySummary.from_counts(self.counts[project], self.edges[project],
+                                          self.npv_mean(project), self.std()[PROJECTS[project]],
+                                          self.prob_negative(project))
+
+
+def stream_summary(n_samples, seed=0):
+    """Run a Monte Carlo simulation of any size in constant memory and return its StreamingSummary"""
+    summary = StreamingSummary()
+    for npv_m1, npv_m2, parameters in monte_carlo_stream(n_samples, seed):
+        summary.update(npv_m1, npv_m2, parameters)
+    return summary
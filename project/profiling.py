@@ -0,0 +1,196 @@
+"""Opt-in stage profiling for report builds.
+
+Inside ``with instrument() as profiler:`` the model entry points the charts
+call (COMPUTE_TARGETS: NPV kernels, Monte Carlo cache, density and bootstrap
+summaries, Sobol, value of information) and every plot_* chart function are
+temporarily wrapped to record wall/CPU time and call counts, and
+main.render_chart marks its plot and savefig stages. Nothing is wrapped
+outside the block, so the disabled cost is one global check per stage() call.
+"""
+import contextlib
+import importlib
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+# (module, function names) wrapped by instrument(): every model entry point
+# the charts call, "Class.method" for methods; plot_* functions of the chart
+# modules are added automatically
+COMPUTE_TARGETS = {
+    'utils': ['annuity_factor', 'annuity_factor_array', 'npv', 'npv_array', 'bcr', 'bcr_array',
+              'irr', 'irr_array', 'scenario_npv', 'scenario_npv_array', 'portfolio_npv',
+              'npv_surface', 'evaluate_portfolio', 'get_scenario_data', 'tornado_data', 'sensitivity_curves',
+              'monte_carlo', 'monte_carlo_arrays', 'monte_carlo_block'],
+    'monte_carlo_cache': ['cached_monte_carlo'],
+    'monte_carlo_analysis': ['_density'],
+    'density': ['DensitySummary.from_samples', 'DensitySummary.kde'],
+    'bootstrap': ['bootstrap_intervals'],
+    'break_even': ['adoption_threshold', 'hardware_threshold', 'uptake_compliance_frontier'],
+    'global_sensitivity': ['cached_sobol_indices', 'sobol_indices'],
+    'value_of_information': ['value_of_information'],
+}
+CHART_MODULES = ['scenario_charts', 'tornado_analysis', 'monte_carlo_analysis']
+
+_active = None
+_NULL = contextlib.nullcontext()
+
+
+def _peak_rss_bytes():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+class Profiler:
+    """Collects per-stage wall/CPU time, call counts, peak RSS and Chrome trace events"""
+
+    def __init__(self, max_events=200_000):
+        self.max_events = max_events
+        self.events = []
+        self.dropped_events = 0
+        self.stats = {}
+        self.origin = time.perf_counter()
+
+    def record(self, name, category, start, wall, cpu):
+        count, total_wall, total_cpu = self.stats.get(name, (0, 0.0, 0.0))
+        self.stats[name] = (count + 1, total_wall + wall, total_cpu + cpu)
+        if len(self.events) < self.max_events:
+            self.events.append({
+                'name': name, 'cat': category, 'ph': 'X',
+                'ts': (start - self.origin) * 1e6, 'dur': wall * 1e6,
+                'pid': os.getpid(), 'tid': threading.get_ident(),
+                'args': {'cpu_ms': cpu * 1e3}
+            })
+        else:
+            self.dropped_events += 1
+
+    @contextlib.contextmanager
+    def stage(self, name, category='stage'):
+        start, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.record(name, category, start, time.perf_counter() - start, time.process_time() - cpu)
+
+    def wrap(self, fn, name, category):
+        def wrapper(*args, **kwargs):
+            start, cpu = time.perf_counter(), time.process_time()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(name, category, start, time.perf_counter() - start, time.process_time() - cpu)
+        wrapper.__wrapped__ = fn
+        wrapper.__name__ = getattr(fn, '__name__', name)
+        wrapper.__doc__ = fn.__doc__
+        return wrapper
+
+    def summary(self):
+        """Rows of (name, calls, wall s, cpu s) sorted by total wall time"""
+        rows = [(name, count, wall, cpu) for name, (count, wall, cpu) in self.stats.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def format_summary(self):
+        lines = [f"{'stage':45s} {'calls':>9s} {'wall ms':>11s} {'cpu ms':>11s}"]
+        for name, count, wall, cpu in self.summary():
+            lines.append(f"{name:45s} {count:9d} {wall * 1e3:11.2f} {cpu * 1e3:11.2f}")
+        lines.append(f"peak RSS: {_peak_rss_bytes() / 2**20:.1f} MiB")
+        if self.dropped_events:
+            lines.append(f"({self.dropped_events} trace events dropped beyond max_events)")
+        return '\n'.join(lines)
+
+    def export_chrome_trace(self, path):
+        """Write a Chrome trace-event JSON file (chrome://tracing, Perfetto)"""
+        events = list(self.events)
+        events.append({
+            'name': 'peak_rss', 'ph': 'C', 'ts': (time.perf_counter() - self.origin) * 1e6,
+            'pid': os.getpid(), 'tid': threading.get_ident(),
+            'args': {'MiB': _peak_rss_bytes() / 2**20}
+        })
+        with open(path, 'w') as f:
+            json.dump({
+                'traceEvents': events,
+                'displayTimeUnit': 'ms',
+                'otherData': {'summary': [dict(zip(('name', 'calls', 'wall_s', 'cpu_s'), row))
+                                          for row in self.summary()],
+                              'peak_rss_bytes': _peak_rss_bytes()}
+            }, f)
+
+
+def stage(name, category='stage'):
+    """Time a block when profiling is active; a shared no-op context otherwise"""
+    if _active is None:
+        return _NULL
+    return _active.stage(name, category)
+
+
+def _targets():
+    """(owner, attribute, label, category) of everything to wrap; owner is a module or class"""
+    targets = []
+    for module_name, names in COMPUTE_TARGETS.items():
+        # Imported now, as charts import some of these only when they run
+        module = importlib.import_module(module_name)
+        for name in names:
+            owner_name, _, attribute = name.rpartition('.')
+            owner = getattr(module, owner_name) if owner_name else module
+            if hasattr(owner, attribute):
+                targets.append((owner, attribute, name, 'compute'))
+    for module_name in CHART_MODULES:
+        module = sys.modules.get(module_name)
+        if module is not None:
+            targets += [(module, name, name, 'plot') for name in dir(module) if name.startswith('plot_')]
+    return targets
+
+
+@contextlib.contextmanager
+def instrument(max_events=200_000):
+    """Profile everything run inside the block; yields the Profiler"""
+    global _active
+    profiler = Profiler(max_events)
+    patched = []  # (namespace, key, original)
+
+    wrappers = {}  # id(original) -> wrapper; functions are compared by identity
+    methods = []  # (class, attribute, original descriptor)
+    for owner, attribute, label, category in _targets():
+        if isinstance(owner, type):
+            # Methods are wrapped on the class itself, keeping classmethods bound to it
+            original = vars(owner)[attribute]
+            if isinstance(original, classmethod):
+                wrapper = classmethod(profiler.wrap(original.__func__, label, category))
+            else:
+                wrapper = profiler.wrap(original, label, category)
+            methods.append((owner, attribute, original))
+            setattr(owner, attribute, wrapper)
+            continue
+        original = getattr(owner, attribute)
+        if id(original) not in wrappers:
+            wrappers[id(original)] = profiler.wrap(original, label, category)
+
+    # Rebind every module-level reference (including `from utils import ...`
+    # copies) and chart tables such as main.CHARTS
+    for module in list(sys.modules.values()):
+        namespace = getattr(module, '__dict__', None)
+        if not namespace or not getattr(module, '__file__', None) or 'site-packages' in module.__file__:
+            continue
+        for key, value in list(namespace.items()):
+            if id(value) in wrappers:
+                patched.append((namespace, key, value))
+                namespace[key] = wrappers[id(value)]
+        charts = namespace.get('CHARTS')
+        if isinstance(charts, dict):
+            for key, (plot, args) in list(charts.items()):
+                if id(plot) in wrappers:
+                    patched.append((charts, key, (plot, args)))
+                    charts[key] = (wrappers[id(plot)], args)
+
+    _active = profiler
+    try:
+        yield profiler
+    finally:
+        _active = None
+        for namespace, key, original in reversed(patched):
+            namespace[key] = original
+        for owner, attribute, original in reversed(methods):
+            setattr(owner, attribute, original)
@@ -0,0 +1,135 @@
+import itertools
+
+import numpy as np
+
+import utils
+from monte_carlo_sampling import parameters_from_uniforms
+
+# Importance sampling happens on the uniforms that parameters_from_uniforms maps
+# through the inverse CDFs, so the nominal density is 1 on the unit cube and the
+# likelihood ratio of a draw is 1 / q(u) whatever the input distributions are.
+# Each proposal coordinate is an exponentially tilted uniform,
+# q(u) = theta e^(theta u) / (e^theta - 1): it keeps the [0, 1] support, is
+# sampled in closed form and, being an exponential family, makes the
+# cross-entropy update a moment match of the elite samples' weighted mean.
+
+_SMALL_TILT = 1e-8
+_MAX_TILT = 500.0
+
+
+def _log_normalizer(theta):
+    """log((e^theta - 1) / theta), 0 at theta = 0"""
+    small = np.abs(theta) < _SMALL_TILT
+    safe = np.where(small, 1.0, theta)
+    return np.where(small, theta / 2, np.log(np.expm1(safe) / safe))
+
+
+def tilt_mean(theta):
+    """Mean of the tilted uniform for each tilt"""
+    theta = np.asarray(theta, dtype=float)
+    small = np.abs(theta) < _SMALL_TILT
+    safe = np.where(small, 1.0, theta)
+    return np.where(small, 0.5 + theta / 12, -1 / np.expm1(-safe) - 1 / safe)
+
+
+def tilt_for_mean(mean, iterations=100):
+    """Tilt whose mean is `mean` (vectorized bisection; mean is clipped to what |theta| <= 500 can reach)"""
+    mean = np.clip(np.asarray(mean, dtype=float), tilt_mean(-_MAX_TILT), tilt_mean(_MAX_TILT))
+    low = np.full(mean.shape, -_MAX_TILT)
+    high = np.full(mean.shape, _MAX_TILT)
+    for _ in range(iterations):
+        mid = (low + high) / 2
+        below = tilt_mean(mid) < mean
+        low = np.where(below, mid, low)
+        high = np.where(below, high, mid)
+    return (low + high) / 2
+
+
+def sample_tilted(rng, theta, n):
+    """(n, k) draws from independent tilted uniforms and the log likelihood ratio log(1 / q(u)) of each"""
+    theta = np.asarray(theta, dtype=float)
+    v = rng.random((n, len(theta)))
+    small = np.abs(theta) < _SMALL_TILT
+    safe = np.where(small, 1.0, theta)
+    u = np.where(small, v, np.log1p(v * np.expm1(safe)) / safe)
+    log_lr = -(u * theta - _log_normalizer(theta)).sum(axis=1)
+    return u, log_lr
+
+
+def _npv(project, u):
+    uptake, compliance, hw_factor = parameters_from_uniforms(u)
+    return utils.portfolio_npv(uptake, compliance, hw_factor)[utils.PROJECTS.index(project)]
+
+
+def support_minimum(project):
+    """Smallest NPV over the input support (NPV is monotone in every input, so a corner attains it)"""
+    corners = np.array(list(itertools.product([0.0, 1.0], repeat=len(utils.MC_DISTRIBUTIONS))))
+    return _npv(project, corners).min().item()
+
+
+def cross_entropy_tilt(project, threshold=0.0, n=10000, rho=0.1, max_iter=20, seed=0):
+    """Tilts pushing the proposal toward NPV < threshold, by multilevel cross-entropy
+
+    Each round moves the level to the rho-quantile of the NPV draws (never
+    below threshold) and refits the tilts to the likelihood-weighted mean of
+    the draws under it. Returns (tilts, level reached, evaluations used).
+    """
+    rng = np.random.default_rng(seed)
+    theta = np.zeros(len(utils.MC_DISTRIBUTIONS))
+    level = np.inf
+    for i in range(max_iter):
+        u, log_lr = sample_tilted(rng, theta, n)
+        npv = _npv(project, u)
+        level = max(threshold, np.quantile(npv, rho))
+        elite = npv <= level
+        weights = np.exp(log_lr[elite] - log_lr[elite].max())
+        theta = tilt_for_mean(weights @ u[elite] / weights.sum())
+        if level <= threshold:
+            break
+    return theta, level, (i + 1) * n
+
+
+def tail_probability(project, threshold=0.0, n=10000, tilt="ce", seed=0, ce_samples=10000):
+    """Importance-sampling estimate of P(NPV < threshold) with its standard error and effective sample size
+
+    tilt is "ce" (tuned by cross_entropy_tilt), a sequence of one tilt per
+    parameter (positive pushes the parameter up, negative down) or None for
+    plain Monte Carlo. If the threshold is at or below the smallest NPV the
+    inputs can produce, the probability is exactly 0 and nothing is sampled.
+    Returns a dict with "probability", "std_error", "relative_error", "ess"
+    (effective number of tail draws), "n_evaluations", "tilt" and
+    "plain_equivalent" (plain Monte Carlo draws needed for the same error).
+    """
+    minimum = support_minimum(project)
+    result = {"project": project, "threshold": threshold, "support_minimum": minimum}
+    if threshold <= minimum:
+        return dict(result, probability=0.0, std_error=0.0, relative_error=0.0, ess=0.0,
+                    n_evaluations=2 ** len(utils.MC_DISTRIBUTIONS), tilt=None, plain_equivalent=np.inf,
+                    exact=True)
+
+    n_evaluations = n
+    if tilt is None:
+        theta = np.zeros(len(utils.MC_DISTRIBUTIONS))
+    elif isinstance(tilt, str) and tilt == "ce":
+        theta, _, used = cross_entropy_tilt(project, threshold, ce_samples, seed=seed)
+        n_evaluations += used
+    else:
+        theta = np.asarray(tilt, dtype=float)
+
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(1,)))
+    u, log_lr = sample_tilted(rng, theta, n)
+    terms = np.where(_npv(project, u) < threshold, np.exp(log_lr), 0.0)
+    probability = terms.mean()
+    std_error = terms.std(ddof=1) / np.sqrt(n)
+    ess = terms.sum() ** 2 / (terms ** 2).sum() if probability > 0 else 0.0
+    return dict(
+        result,
+        probability=probability.item(),
+        std_error=std_error.item(),
+        relative_error=(std_error / probability).item() if probability > 0 else np.inf,
+        ess=float(ess),
+        n_evaluations=n_evaluations,
+        tilt=dict(zip(utils.MC_DISTRIBUTIONS, theta.tolist())),
+        plain_equivalent=(probability * (1 - probability) / std_error ** 2).item() if std_error > 0 else np.inf,
+        exact=False
+    )
@@ -0,0 +1,171 @@
+import ast
+import datetime
+import functools
+import hashlib
+import inspect
+import json
+import os
+
+import utils
+
+MANIFEST_NAME = '.build_manifest.json'
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Hashed for every chart: it sets the style, DPI and chart registry
+BUILD_SCRIPT = os.path.join(HERE, 'main.py')
+
+# Top-level data assignments left out of a module's code hash: each is hashed
+# as a declared input (see input_values), so editing e.g. MACRO2's opex only
+# rebuilds the charts declaring it, not every chart that imports utils
+DATA_ASSIGNMENTS = {
+    'utils.py': {'MACRO1', 'MACRO2', 'RATES', 'N_YEARS', 'SCENARIOS', 'SENSITIVITY_PARAMETERS',
+                 'MC_DISTRIBUTIONS', 'MC_SETTINGS', 'MC_BLOCK_SIZE'}
+}
+
+
+def project_inputs(*keys):
+    """Input names of every field of the given projects (all projects if none given)"""
+    keys = keys or utils.PROJECTS.keys
+    return [f'{key}.{field}' for key in keys for field in ('label',) + utils.ProjectTable.FIELDS]
+
+
+def input_values():
+    """Current value of every declarable input, by name"""
+    values = {}
+    for key in utils.PROJECTS.keys:
+        row = utils.PROJECTS.row(key)
+        values.update({f'{key}.{field}': row[field] for field in ('label',) + utils.ProjectTable.FIELDS})
+    values.update({
+        'RATES': utils.RATES,
+        'N_YEARS': utils.N_YEARS,
+        'SCENARIOS': utils.SCENARIOS,
+        'SENSITIVITY_PARAMETERS': utils.SENSITIVITY_PARAMETERS,
+        'MC_DISTRIBUTIONS': utils.MC_DISTRIBUTIONS,
+        'MC_SETTINGS': dict(utils.MC_SETTINGS, block_size=utils.MC_BLOCK_SIZE),
+    })
+    return values
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def value_hash(value):
+    return _digest(json.dumps(value, sort_keys=True, default=str).encode())
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return _digest(f.read())
+
+
+def code_hash(path):
+    """Hash of a source file, ignoring its DATA_ASSIGNMENTS (which are hashed as inputs)"""
+    data = DATA_ASSIGNMENTS.get(os.path.basename(path))
+    if not data:
+        return file_hash(path)
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    tree.body = [node for node in tree.body
+                 if not (isinstance(node, ast.Assign) and {getattr(t, 'id', None) for t in node.targets} <= data)]
+    return _digest(ast.dump(tree).encode())
+
+
+@functools.lru_cache(maxsize=None)
+def _local_imports(path, mtime):
+    """Project modules imported anywhere in a file, including imports inside functions (cached per mtime)"""
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+    paths = (os.path.join(HERE, f'{name}.py') for name in names)
+    return frozenset(p for p in paths if os.path.exists(p))
+
+
+def module_closure(path):
+    """The file plus every project module it imports, directly or transitively"""
+    seen, todo = set(), [os.path.abspath(path)]
+    while todo:
+        current = todo.pop()
+        if current not in seen:
+            seen.add(current)
+            todo.extend(_local_imports(current, os.path.getmtime(current)) - seen)
+    return seen
+
+
+def code_hashes(plot):
+    """{file: hash} of main.py, the chart's plotting module and every project module it imports"""
+    files = module_closure(inspect.getsourcefile(inspect.unwrap(plot)))  # Unwrap profiling wrappers
+    files.add(BUILD_SCRIPT)
+    return {os.path.basename(path): code_hash(path) for path in sorted(files)}
+
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {'charts': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def chart_state(name, charts, chart_inputs, values):
+    """Hashes of everything a chart depends on"""
+    plot, args = charts[name]
+    return {
+        'inputs': {key: value_hash(values[key]) for key in chart_inputs[name]},
+        'args': value_hash(args),
+        'code': code_hashes(plot)
+    }
+
+
+def stale_reasons(state, entry, output_path):
+    """Why a chart must be rebuilt (empty when it is up to date)"""
+    if entry is None:
+        return ['not built before']
+    if not os.path.exists(output_path):
+        return ['output missing']
+    if file_hash(output_path) != entry.get('output'):
+        return ['output modified']
+    reasons = [f'{key} changed' for key, h in state['inputs'].items() if entry['inputs'].get(key) != h]
+    reasons += [f'{key} no longer an input' for key in entry['inputs'] if key not in state['inputs']]
+    if entry.get('args') != state['args']:
+        reasons.append('arguments changed')
+    reasons += [f'code changed: {file}' for file, h in state['code'].items() if entry['code'].get(file) != h]
+    return reasons
+
+
+def plan(names, charts, chart_inputs, output_dir, force=False):
+    """({chart: reasons} to rebuild, {chart: state}) for the selected charts"""
+    manifest = load_manifest(output_dir)
+    values = input_values()
+    states, rebuild = {}, {}
+    for name in names:
+        states[name] = chart_state(name, charts, chart_inputs, values)
+        reasons = (['forced'] if force else
+                   stale_reasons(states[name], manifest['charts'].get(name),
+                                 os.path.join(output_dir, f'{name}.png')))
+        if reasons:
+            rebuild[name] = reasons
+    return rebuild, states
+
+
+def record(rebuild, states, output_dir):
+    """Store the new hashes of the rebuilt charts and a log of what was rebuilt and why"""
+    manifest = load_manifest(output_dir)
+    now = datetime.datetime.now().isoformat(timespec='seconds')
+    for name in rebuild:
+        manifest['charts'][name] = dict(states[name], output=file_hash(os.path.join(output_dir, f'{name}.png')),
+                                        built=now)
+    manifest['last_build'] = {
+        'time': now,
+        'rebuilt': rebuild,
+        'up_to_date': [name for name in states if name not in rebuild]
+    }
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
@@ -0,0 +1,161 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+import utils
+
+MANIFEST = "manifest.json"
+STORE_VERSION = 1
+
+# .npy header size reserved for every column so the row count can be
+# rewritten in place on append (format 1.0: magic, version, uint16 length)
+_HEADER_SIZE = 128
+_MAGIC = b"\x93NUMPY\x01\x00"
+
+
+def _write_header(f, dtype, shape):
+    header = repr({"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                   "fortran_order": False, "shape": tuple(shape)})
+    length = _HEADER_SIZE - len(_MAGIC) - 2
+    if len(header) + 1 > length:
+        raise ValueError(f"Column shape {shape} does not fit the reserved .npy header")
+    f.seek(0)
+    f.write(_MAGIC + struct.pack("<H", length) + header.ljust(length - 1).encode("latin1") + b"\n")
+
+
+class SampleStore:
+    """Columnar on-disk store of Monte Carlo samples: one .npy file per column plus a JSON manifest
+
+    Columns hold rows of a fixed dtype and trailing shape (e.g. NPV per
+    rate). append() writes chunks to the end of every column and updates the
+    row count; column() returns read-only memory maps, so reopening a run of
+    any size costs nothing until the data is touched.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+
+    @classmethod
+    def create(cls, path, columns, metadata=None):
+        """New empty store; columns maps name -> dtype or (dtype, trailing shape)"""
+        os.makedirs(path, exist_ok=True)
+        spec = {}
+        for name, column in columns.items():
+            dtype, trailing = column if isinstance(column, tuple) else (column, ())
+            spec[name] = {"dtype": np.dtype(dtype).str, "shape": list(trailing), "file": f"{name}.npy"}
+            with open(os.path.join(path, spec[name]["file"]), "wb") as f:
+                _write_header(f, dtype, (0,) + tuple(trailing))
+        manifest = {"version": STORE_VERSION, "rows": 0, "columns": spec, "metadata": metadata or {}}
+        cls._save_manifest(path, manifest)
+        return cls(path)
+
+    @staticmethod
+    def _save_manifest(path, manifest):
+        tmp = os.path.join(path, MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, os.path.join(path, MANIFEST))
+
+    @property
+    def columns(self):
+        return list(self.manifest["columns"])
+
+    @property
+    def metadata(self):
+        return self.manifest["metadata"]
+
+    def __len__(self):
+        return self.manifest["rows"]
+
+    def append(self, **arrays):
+        """Add the same number of rows to every column (values are cast to the column dtype)"""
+        if set(arrays) != set(self.columns):
+            raise ValueError(f"append needs exactly the columns {self.columns}")
+        rows = {len(np.asarray(a)) for a in arrays.values()}
+        if len(rows) != 1:
+            raise ValueError("All columns must get the same number of rows")
+        rows = rows.pop()
+        total = len(self) + rows
+        for name, values in arrays.items():
+            spec = self.manifest["columns"][name]
+            values = np.ascontiguousarray(values, dtype=spec["dtype"])
+            if values.shape[1:] != tuple(spec["shape"]):
+                raise ValueError(f"Column '{name}' expects rows of shape {tuple(spec['shape'])}")
+            with open(os.path.join(self.path, spec["file"]), "r+b") as f:
+                row_bytes = values.dtype.itemsize * int(np.prod(spec["shape"]))
+                f.seek(_HEADER_SIZE + len(self) * row_bytes)
+                f.write(values.tobytes())
+                f.truncate()
+                _write_header(f, spec["dtype"], (total,) + tuple(spec["shape"]))
+        self.manifest["rows"] = total
+        self._save_manifest(self.path, self.manifest)
+
+    def truncate(self, rows):
+        """Drop every row from index rows on, shortening the column files to match"""
+        if not 0 <= rows <= len(self):
+            raise ValueError(f"Cannot truncate a store of {len(self)} rows to {rows}")
+        for spec in self.manifest["columns"].values():
+            with open(os.path.join(self.path, spec["file"]), "r+b") as f:
+                row_bytes = np.dtype(spec["dtype"]).itemsize * int(np.prod(spec["shape"]))
+                f.truncate(_HEADER_SIZE + rows * row_bytes)
+                _write_header(f, spec["dtype"], (rows,) + tuple(spec["shape"]))
+        self.manifest["rows"] = rows
+        self._save_manifest(self.path, self.manifest)
+
+    def column(self, name):
+        """Read-only memory map of a column (zero-copy; pages are read on access)"""
+        spec = self.manifest["columns"][name]
+        if len(self) == 0:
+            return np.empty((0,) + tuple(spec["shape"]), dtype=spec["dtype"])
+        return np.load(os.path.join(self.path, spec["file"]), mmap_mode="r")
+
+    def __getitem__(self, name):
+        return self.column(name)
+
+
+def write_monte_carlo(path, n_samples, seed=0, rates=None, dtype="float64", projects=None):
+    """Simulate into a SampleStore block by block and return it
+
+    Columns are the sampled parameters and NPV_<project> (€ millions), with a
+    trailing rate axis when rates is a list. Calling again on an existing store
+    of the same seed, rates and dtype extends it to n_samples in total, drawing
+    exactly the samples a single run would have: a partial last block is
+    dropped and redrawn at its new size, the blocks after it are appended.
+    """
+    projects = projects or utils.PROJECTS
+    params = list(utils.MC_DISTRIBUTIONS)
+    rate_axis = None if rates is None else [float(r) for r in np.atleast_1d(rates)]
+    metadata = {"seed": seed, "rates": rate_axis, "block_size": utils.MC_BLOCK_SIZE,
+                "projects": list(projects.keys), "distributions": utils.MC_DISTRIBUTIONS,
+                "n_years": utils.N_YEARS, "dtype": np.dtype(dtype).name}
+
+    if os.path.exists(os.path.join(path, MANIFEST)):
+        store = SampleStore(path)
+        if store.metadata != json.loads(json.dumps(metadata)):
+            raise ValueError(f"Existing store at {path} was written with different settings")
+        if len(store) >= n_samples:
+            return store
+        # A partial last block holds other draws than the full block (each
+        # block's stream is split between its columns), so it is redrawn
+        store.truncate(len(store) - len(store) % utils.MC_BLOCK_SIZE)
+    else:
+        trailing = () if rate_axis is None else (len(rate_axis),)
+        columns = {name: dtype for name in params}
+        columns.update({f"NPV_{key}": (dtype, trailing) for key in projects.keys})
+        store = SampleStore.create(path, columns, metadata)
+
+    sizes = utils.block_sizes(n_samples)
+    for block in range(len(store) // utils.MC_BLOCK_SIZE, len(sizes)):
+        uptake, compliance, hw_factor = utils.sample_parameters(utils.block_rng(seed, block), sizes[block])
+        if rate_axis is None:
+            npv = utils.portfolio_npv(uptake, compliance, hw_factor, projects=projects)
+        else:
+            npv = utils.portfolio_npv(uptake[:, None], compliance[:, None], hw_factor[:, None],
+                                      np.array(rate_axis), projects=projects)
+        store.append(**dict(zip(params, (uptake, compliance, hw_factor))),
+                     **{f"NPV_{key}": npv[p] for p, key in enumerate(projects.keys)})
+    return store
@@ -1,28 +1,42 @@
 import matplotlib.pyplot as plt
 import numpy as np
-from utils import get_scenario_data
+from utils import PROJECTS, get_scenario_data
+
+# One color and marker per project, in project table order
+PROJECT_COLORS = ['#4472C4', '#ED7D31', '#70AD47', '#7030A0', '#FFC000', '#5B9BD5', '#A5A5A5', '#C00000']
+PROJECT_MARKERS = ['o', 's', '^', 'D', 'v', 'P', 'X', '*']
+
+
+def project_style(i):
+    """Color and marker for the i-th project"""
+    return PROJECT_COLORS[i % len(PROJECT_COLORS)], PROJECT_MARKERS[i % len(PROJECT_MARKERS)]
+
+
+def bar_offsets(n_projects, group_width=0.7):
+    """Bar width and per-project x offsets for grouped bars"""
+    width = group_width / n_projects
+    return width, [(i - (n_projects - 1) / 2) * width for i in range(n_projects)]
+
 
 def plot_scenario_comparison():
-    """Create bar chart comparing scenarios for both projects"""
+    """Create bar chart comparing scenarios for all projects"""
     scenario_data = get_scenario_data()
     
     # Extract data
     scenarios = ["Optimistic", "Expected", "Pessimistic"]
-    macro1_values = [scenario_data["MACRO1"][s] for s in scenarios]
-    macro2_values = [scenario_data["MACRO2"][s] for s in scenarios]
+    values = [[scenario_data[key][s] for s in scenarios] for key in PROJECTS.keys]
     
     # Set up plot
     fig, ax = plt.subplots(figsize=(10, 6))
     
     # Width of bars and positions
-    width = 0.35
+    width, offsets = bar_offsets(len(PROJECTS))
     x = np.arange(len(scenarios))
     
     # Plot bars
-    bars1 = ax.bar(x - width/2, macro1_values, width, label='Patient-Specific VC', 
-                  color='#4472C4', edgecolor='black', linewidth=0.5)
-    bars2 = ax.bar(x + width/2, macro2_values, width, label='Hospital Sim & Ed', 
-                  color='#ED7D31', edgecolor='black', linewidth=0.5)
+    bars = [ax.bar(x + offset, project_values, width, label=label,
+                   color=project_style(i)[0], edgecolor='black', linewidth=0.5)
+            for i, (offset, project_values, label) in enumerate(zip(offsets, values, PROJECTS.labels))]
     
     # Add value labels on bars
     def add_labels(bars):
@@ -32,8 +46,8 @@ def plot_scenario_comparison():
             ax.text(bar.get_x() + bar.get_width()/2., label_y_pos,
                     f'€{height:.1f}m', ha='center', va='bottom', fontweight='bold')
     
-    add_labels(bars1)
-    add_labels(bars2)
+    for project_bars in bars:
+        add_labels(project_bars)
     
     # Customize plot
     ax.set_title('NPV by Scenario (0.8% Social Discount Rate)', fontsize=14, pad=20)
@@ -49,8 +63,8 @@ def plot_scenario_comparison():
     ax.grid(axis='y', linestyle='--', alpha=0.3)
     
     # Set y-axis limits to show negative values
-    min_value = min(min(macro1_values), min(macro2_values))
-    ax.set_ylim(min_value - 1 if min_value < 0 else -0.5, max(max(macro1_values), max(macro2_values)) + 1)
+    min_value = np.min(values)
+    ax.set_ylim(min_value - 1 if min_value < 0 else -0.5, np.max(values) + 1)
     
     # Customize spines
     for spine in ['top', 'right']:
@@ -71,60 +85,52 @@ def plot_scenario_comparison():
 
 def plot_discount_rate_sensitivity():
     """Create line chart showing NPV sensitivity to discount rates"""
-    # Discount rates to analyze
-    rates = [0.001, 0.005, 0.008, 0.01, 0.02, 0.03, 0.04, 0.05, 0.057, 0.07, 0.1]
-    rate_labels = [f"{r*100:.1f}%" for r in rates]
+    from discount import DiscountCurve
+    from utils import N_YEARS, portfolio_npv
+    
+    # Dense sweep of flat rates, evaluated as one curve family in a single call
+    rates = np.linspace(0.001, 0.1, 2000)
+    npvs = portfolio_npv(1.0, 1.0, 1.0, DiscountCurve.flat(rates), N_YEARS)
     
-    # Project parameters
-    from utils import MACRO1, MACRO2, npv
+    # Highlight specific rates
+    highlight_rates = [0.008, 0.03, 0.057]
+    highlight_npvs = portfolio_npv(1.0, 1.0, 1.0, np.array(highlight_rates))
     
-    # Calculate NPVs for each rate
-    npv_m1 = [npv(MACRO1["capex"], MACRO1["opex"], MACRO1["benefit"], r) / 1e6 for r in rates]
-    npv_m2 = [npv(MACRO2["capex"], MACRO2["opex"], MACRO2["benefit"], r) / 1e6 for r in rates]
+    # Declining long-term schedule for comparison
+    green_book = portfolio_npv(1.0, 1.0, 1.0, DiscountCurve.green_book(), N_YEARS)
     
     # Create plot
     fig, ax = plt.subplots(figsize=(12, 6))
     
-    # Plot lines
-    ax.plot(rate_labels, npv_m1, 'o-', color='#4472C4', linewidth=2, markersize=8, 
-            label='Patient-Specific VC')
-    ax.plot(rate_labels, npv_m2, 's-', color='#ED7D31', linewidth=2, markersize=8, 
-            label='Hospital Sim & Ed')
-    
-    # Highlight specific rates
-    highlight_indices = [2, 6, 8]  # 0.8%, 3%, 5.7%
-    highlight_rates = [rates[i] for i in highlight_indices]
-    highlight_labels = [rate_labels[i] for i in highlight_indices]
-    highlight_m1 = [npv_m1[i] for i in highlight_indices]
-    highlight_m2 = [npv_m2[i] for i in highlight_indices]
-    
-    ax.plot(highlight_labels, highlight_m1, 'o', color='#4472C4', markersize=12, markeredgecolor='black')
-    ax.plot(highlight_labels, highlight_m2, 's', color='#ED7D31', markersize=12, markeredgecolor='black')
-    
-    # Add value labels for highlighted points
-    for i, txt in enumerate(highlight_labels):
-        ax.annotate(f'€{highlight_m1[i]:.1f}m', 
-                    (highlight_labels[i], highlight_m1[i]), 
-                    xytext=(5, 10), textcoords='offset points',
-                    fontweight='bold')
-        ax.annotate(f'€{highlight_m2[i]:.1f}m', 
-                    (highlight_labels[i], highlight_m2[i]), 
-                    xytext=(5, -15), textcoords='offset points',
-                    fontweight='bold')
+    for p, (project_npv, label) in enumerate(zip(npvs, PROJECTS.labels)):
+        color, marker = project_style(p)
+        
+        # Plot lines
+        ax.plot(rates * 100, project_npv, '-', color=color, linewidth=2, label=label)
+        ax.plot(np.array(highlight_rates) * 100, highlight_npvs[p], marker, color=color, markersize=12,
+                markeredgecolor='black')
+        ax.axhline(y=green_book[p], color=color, linestyle=':', linewidth=1.5, alpha=0.8)
+        
+        # Add value labels for highlighted points, alternating above and below the line
+        for rate, value in zip(highlight_rates, highlight_npvs[p]):
+            ax.annotate(f'€{value:.1f}m',
+                        (rate * 100, value),
+                        xytext=(5, 10) if p % 2 == 0 else (5, -15), textcoords='offset points',
+                        fontweight='bold')
     
     # Customize plot
     ax.set_title('NPV Sensitivity to Discount Rate', fontsize=14, pad=20)
     ax.set_ylabel('Net Present Value (€ millions)', fontsize=12)
-    ax.set_xlabel('Discount Rate', fontsize=12)
+    ax.set_xlabel('Discount Rate (%)', fontsize=12)
+    ax.set_xlim(0, rates[-1] * 100)
     ax.legend(loc='upper right', frameon=True)
     
     # Add a horizontal line at y=0
     ax.axhline(y=0, color='black', linestyle='-', linewidth=0.7, alpha=0.5)
     
     # Add vertical lines for key rates
-    for i in highlight_indices:
-        ax.axvline(x=rate_labels[i], color='gray', linestyle='--', alpha=0.5)
-    
+    for rate in highlight_rates:
+        ax.axvline(x=rate * 100, color='gray', linestyle='--', alpha=0.5)
     
     # Add grid lines
     ax.grid(True, linestyle='--', alpha=0.3)
@@ -133,46 +139,36 @@ def plot_discount_rate_sensitivity():
     for spine in ['top', 'right']:
         ax.spines[spine].set_visible(False)
     
-    plt.tight_layout()
+    # Add explanatory text
+    footnote = "Dotted lines: NPV under the declining Green Book schedule (3.5% for years 1-30)."
+    fig.text(0.1, 0.01, footnote, fontsize=9, va='bottom', ha='left')
+    
+    plt.tight_layout(rect=[0, 0.04, 1, 0.98])
     
     return fig
 
 def plot_break_even_analysis():
     """Create chart showing break-even adoption factors"""
-    from utils import MACRO1, MACRO2, RATES
+    from break_even import adoption_threshold
     
     # Calculate adoption factors required for break-even across different discount rates
     rates = [0.008, 0.03, 0.05, 0.057]
     rate_labels = ["0.8% SDR", "3% SDR", "5% SDR", "5.7% WACC"]
     
-    # Function to calculate break-even adoption factor
-    def adoption_threshold(capex, opex, benefit, rate):
-        low, high = 0.0, 2.0
-        for _ in range(60):
-            mid = (low+high)/2
-            from utils import npv
-            if npv(capex, opex, benefit*mid, rate) > 0:
-                high = mid
-            else:
-                low = mid
-        return high
-    
-    # Calculate thresholds for each rate
-    m1_thresholds = [adoption_threshold(MACRO1["capex"], MACRO1["opex"], MACRO1["benefit"], r) for r in rates]
-    m2_thresholds = [adoption_threshold(MACRO2["capex"], MACRO2["opex"], MACRO2["benefit"], r) for r in rates]
+    # Break-even adoption factors, solved in closed form for all projects and rates
+    thresholds = adoption_threshold(rates)
     
     # Create plot
     fig, ax = plt.subplots(figsize=(10, 6))
     
     # Bar positions
     x = np.arange(len(rate_labels))
-    width = 0.35
+    width, offsets = bar_offsets(len(PROJECTS))
     
     # Plot bars
-    bars1 = ax.bar(x - width/2, m1_thresholds, width, label='Patient-Specific VC', 
-                  color='#4472C4', edgecolor='black', linewidth=0.5)
-    bars2 = ax.bar(x + width/2, m2_thresholds, width, label='Hospital Sim & Ed', 
-                  color='#ED7D31', edgecolor='black', linewidth=0.5)
+    bars = [ax.bar(x + offset, project_thresholds, width, label=label,
+                   color=project_style(i)[0], edgecolor='black', linewidth=0.5)
+            for i, (offset, project_thresholds, label) in enumerate(zip(offsets, thresholds, PROJECTS.labels))]
     
     # Add value labels
     def add_labels(bars):
@@ -181,8 +177,8 @@ def plot_break_even_analysis():
             ax.text(bar.get_x() + bar.get_width()/2., height + 0.02,
                     f'{height:.2f}', ha='center', va='bottom', fontweight='bold')
     
-    add_labels(bars1)
-    add_labels(bars2)
+    for project_bars in bars:
+        add_labels(project_bars)
     
     # Customize plot
     ax.set_title('Break-even Adoption Factor by Discount Rate', fontsize=14, pad=20)
@@ -212,4 +208,46 @@ def plot_break_even_analysis():
     
     plt.tight_layout(rect=[0, 0.05, 1, 0.98])
     
-    return fig
\ No newline at end of file
+    return fig
+
+def plot_break_even_frontier():
+    """Create chart of the uptake x compliance combinations where NPV = 0"""
+    from utils import RATES
+    from break_even import uptake_compliance_frontier
+    
+    # Dense uptake grid; the frontier is solved analytically at every point
+    uptake = np.linspace(0.05, 1.5, 500)
+    frontier = uptake_compliance_frontier(uptake[None, :], np.array(list(RATES.values()))[:, None])
+    
+    fig, ax = plt.subplots(figsize=(10, 6))
+    linestyles = ['-', '--', '-.', ':']
+    
+    for p, label in enumerate(PROJECTS.labels):
+        color = project_style(p)[0]
+        for r, rate_label in enumerate(RATES):
+            ax.plot(uptake, frontier[p, r], color=color, linestyle=linestyles[r % len(linestyles)],
+                    linewidth=2, label=f'{label} ({rate_label})')
+    
+    # Expected case
+    ax.plot(1.0, 1.0, 'k*', markersize=15, label='Expected case')
+    
+    # Customize plot
+    ax.set_title('Break-even Frontier: Uptake x Compliance (NPV = 0)', fontsize=14, pad=20)
+    ax.set_xlabel('Uptake Factor', fontsize=12)
+    ax.set_ylabel('Compliance Factor', fontsize=12)
+    ax.set_xlim(uptake[0], uptake[-1])
+    ax.set_ylim(0, 1.5)
+    ax.legend(loc='upper right', frameon=True, fontsize=8, ncol=2)
+    ax.grid(True, linestyle='--', alpha=0.3)
+    
+    # Customize spines
+    for spine in ['top', 'right']:
+        ax.spines[spine].set_visible(False)
+    
+    # Add explanatory text
+    footnote = "Combinations above a curve give a positive NPV for that project and discount rate."
+    fig.text(0.1, 0.01, footnote, fontsize=9, va='bottom', ha='left')
+    
+    plt.tight_layout(rect=[0, 0.05, 1, 0.98])
+    
+    return fig
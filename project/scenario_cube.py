@@ -0,0 +1,176 @@
+import json
+import os
+
+import numpy as np
+
+import utils
+
+AXES = ("project", "uptake", "compliance", "hw", "rate")
+METRICS = ("npv", "bcr")
+MANIFEST = "cube.json"
+
+# Full-factorial grid used when no axes are given: 2 x 81 x 61 x 61 x 33 ~ 2 * 10^7 cells
+DEFAULT_GRID = {
+    "uptake": np.linspace(0.4, 1.2, 81),
+    "compliance": np.linspace(0.7, 1.3, 61),
+    "hw": np.linspace(0.7, 1.3, 61),
+    "rate": np.linspace(0.0, 0.08, 33)
+}
+
+
+class ScenarioCube:
+    """NPV (€ millions) and BCR over a project x uptake x compliance x hw x rate grid, memory-mapped from disk
+
+    A cube is a directory holding one .npy file per metric plus a JSON
+    manifest with the axis coordinates. build() fills it in vectorized blocks;
+    opening it maps the files read-only, so slices, interpolation and argmax/
+    threshold queries read only the cells they touch and nothing is recomputed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        self.axes = {name: (self.manifest["axes"][name] if name == "project"
+                            else np.array(self.manifest["axes"][name]))
+                     for name in AXES}
+        self.data = {metric: np.load(os.path.join(path, f"{metric}.npy"), mmap_mode="r")
+                     for metric in self.manifest["metrics"]}
+
+    @classmethod
+    def build(cls, path, uptake=None, compliance=None, hw=None, rate=None, projects=None,
+              n=utils.N_YEARS, dtype="float32", block_cells=2**22):
+        """Evaluate the full grid into path (created if needed) and return the opened cube"""
+        projects = projects or utils.PROJECTS
+        given = {"uptake": uptake, "compliance": compliance, "hw": hw, "rate": rate}
+        grid = {name: np.asarray(DEFAULT_GRID[name] if values is None else values, dtype=float)
+                for name, values in given.items()}
+        shape = (len(projects),) + tuple(len(grid[name]) for name in AXES[1:])
+
+        os.makedirs(path, exist_ok=True)
+        out = {metric: np.lib.format.open_memmap(os.path.join(path, f"{metric}.npy"), mode="w+",
+                                                 dtype=dtype, shape=shape)
+               for metric in METRICS}
+
+        u, c, h = grid["uptake"], grid["compliance"], grid["hw"]
+        ann = utils.annuity_factor_array(grid["rate"], n)[None, None, None, :]
+        # Blocks of whole uptake slabs bounded to block_cells cells
+        step = max(1, block_cells // int(np.prod(shape[2:])))
+        for p in range(len(projects)):
+            capex, opex, benefit, hw_share = (getattr(projects, field)[p]
+                                              for field in ("capex", "opex", "benefit", "hw_share"))
+            cost = capex * (1 - hw_share) + capex * hw_share * h[None, None, :, None] + opex * ann
+            for start in range(0, len(u), step):
+                pv_benefit = benefit * u[start:start + step, None, None, None] * c[None, :, None, None] * ann
+                out["npv"][p, start:start + step] = (pv_benefit - cost) / 1e6
+                out["bcr"][p, start:start + step] = pv_benefit / cost
+
+        for array in out.values():
+            array.flush()
+        manifest = {
+            "axes": {"project": list(projects.keys), **{name: grid[name].tolist() for name in AXES[1:]}},
+            "metrics": list(METRICS),
+            "shape": list(shape),
+            "dtype": dtype,
+            "n_years": n
+        }
+        with open(os.path.join(path, MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+        del out
+        return cls(path)
+
+    @property
+    def shape(self):
+        return tuple(self.manifest["shape"])
+
+    def _index(self, name, value):
+        """Index along one axis: scalar -> nearest point (axis dropped), (low, high) slice -> range, list -> points"""
+        coords = self.axes[name]
+        if value is None:
+            return slice(None)
+        if name == "project":
+            return coords.index(value) if isinstance(value, str) else [coords.index(v) for v in value]
+        if isinstance(value, slice):
+            low = -np.inf if value.start is None else value.start
+            high = np.inf if value.stop is None else value.stop
+            idx = np.flatnonzero((coords >= low) & (coords <= high))
+            return slice(idx[0], idx[-1] + 1) if len(idx) else slice(0, 0)
+        nearest = np.abs(coords[:, None] - np.atleast_1d(np.asarray(value, dtype=float))[None, :]).argmin(axis=0)
+        return nearest.item() if np.ndim(value) == 0 else nearest
+
+    def sel(self, metric="npv", **coords):
+        """(values, remaining axes) for a selection; each axis takes a label/value, slice(low, high), list or None"""
+        unknown = set(coords) - set(AXES)
+        if unknown:
+            raise ValueError(f"Unknown axes {sorted(unknown)}. Choose from: {', '.join(AXES)}")
+        index = [self._index(name, coords.get(name)) for name in AXES]
+        # Apply list selections one axis at a time so they do not broadcast together
+        values = self.data[metric]
+        axes = {}
+        position = 0
+        for name, idx in zip(AXES, index):
+            if isinstance(idx, (int, np.integer)):
+                values = np.take(values, idx, axis=position)
+                continue
+            values = values[(slice(None),) * position + (idx,)]
+            labels = self.axes[name]
+            axes[name] = ([labels[i] for i in idx] if name == "project" and isinstance(idx, list)
+                          else labels[idx])
+            position += 1
+        return np.asarray(values), axes
+
+    def interp(self, project, uptake, compliance, hw, rate, metric="npv"):
+        """Multilinear interpolation between grid points, broadcast over arrays of coordinates"""
+        p = self.axes["project"].index(project)
+        points = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (uptake, compliance, hw, rate)))
+        lower, weight = [], []
+        for name, x in zip(AXES[1:], points):
+            coords = self.axes[name]
+            i = np.clip(np.searchsorted(coords, x, side="right") - 1, 0, len(coords) - 2)
+            lower.append(i)
+            weight.append((x - coords[i]) / (coords[i + 1] - coords[i]))
+
+        values = self.data[metric][p]
+        result = np.zeros(points[0].shape)
+        for corner in range(1 << len(lower)):
+            bits = [(corner >> d) & 1 for d in range(len(lower))]
+            w = np.ones(points[0].shape)
+            for bit, t in zip(bits, weight):
+                w = w * (t if bit else 1 - t)
+            result += w * values[tuple(i + bit for i, bit in zip(lower, bits))]
+        return result[()]
+
+    def argmax(self, metric="npv", **coords):
+        """Coordinates and value of the largest cell in a selection"""
+        values, axes = self.sel(metric, **coords)
+        idx = np.unravel_index(np.argmax(values), values.shape)
+        best = {name: (labels[i] if name == "project" else labels[i].item())
+                for (name, labels), i in zip(axes.items(), idx)}
+        best[metric] = values[idx].item()
+        return best
+
+    def threshold(self, along, value=0.0, metric="npv", rising=True, **coords):
+        """Coordinate along an axis where the metric first reaches value, for every other selected cell
+
+        rising=True finds where it climbs to >= value (e.g. uptake), False
+        where it falls to <= value (e.g. hardware cost factor); linear between
+        grid points. Returns (thresholds, remaining axes): the first grid
+        coordinate where it already holds there, NaN where never reached.
+        """
+        values, axes = self.sel(metric, **coords)
+        if along not in axes:
+            raise ValueError(f"'{along}' must be a selected numeric axis")
+        position = list(axes).index(along)
+        grid = axes.pop(along)
+        values = np.moveaxis(values, position, -1)
+
+        reached = values >= value if rising else values <= value
+        k = reached.argmax(axis=-1)
+        found = reached.any(axis=-1)
+        prev = np.maximum(k - 1, 0)
+        m0 = np.take_along_axis(values, prev[..., None], -1)[..., 0]
+        m1 = np.take_along_axis(values, k[..., None], -1)[..., 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(k > 0, (value - m0) / (m1 - m0), 1.0)
+        result = grid[prev] + t * (grid[k] - grid[prev])
+        return np.where(found, result, np.nan), axes
@@ -0,0 +1,264 @@
+"""Long-running local evaluation service for scenario NPVs.
+
+    python service.py [--host 127.0.0.1] [--port 8765] [--unix PATH] [--window-ms 2]
+
+POST /evaluate takes one scenario object, a list of them, or an object whose
+fields are equal-length lists: {"project": "MACRO1", "uptake": 1.0,
+"compliance": 1.0, "hw": 1.0, "rate": 0.008}. It answers {"npv": [...]} in
+€ millions; rates must exceed -1 and multipliers be non-negative. Requests
+arriving within the batching window are evaluated together in one vectorized
+pass. GET /stats reports throughput, batch sizes and latency percentiles.
+"""
+import argparse
+import asyncio
+import collections
+import json
+import time
+
+import numpy as np
+
+import utils
+
+FIELDS = ("uptake", "compliance", "hw", "rate")
+DEFAULTS = {"uptake": 1.0, "compliance": 1.0, "hw": 1.0, "rate": 0.008}
+
+
+class BatchEvaluator:
+    """Collects concurrent scenario requests and evaluates them in vectorized batches
+
+    Project columns stay resident and annuity factors are kept in a table
+    keyed by rate, so a batch costs a dictionary lookup per distinct rate plus
+    a handful of array operations.
+    """
+
+    def __init__(self, window=0.002, max_batch=2**16, projects=None, n=utils.N_YEARS,
+                 max_table=2**20, max_latencies=10000):
+        self.window = window
+        self.max_batch = max_batch
+        self.projects = projects or utils.PROJECTS
+        self.project_index = {key: i for i, key in enumerate(self.projects.keys)}
+        self.n = n
+        self.annuity = {}
+        self.max_table = max_table
+        self._pending = []
+        self._pending_size = 0
+        self._timer = None
+
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.evaluations = 0
+        self.batches = 0
+        self.latencies = collections.deque(maxlen=max_latencies)
+
+    def parse(self, payload):
+        """(project indices, uptake, compliance, hw, rate) arrays from a request body"""
+        items = payload if isinstance(payload, list) else [payload]
+        scalars = {name: [] for name in ("project",) + FIELDS}
+        arrays = []
+        for item in items:
+            if not isinstance(item, dict) or "project" not in item:
+                raise ValueError("Each scenario must be an object with at least a 'project' field")
+            unknown = set(item) - set(scalars)
+            if unknown:
+                raise ValueError(f"Unknown fields {sorted(unknown)}")
+            if any(isinstance(value, list) for value in item.values()):
+                # Columnar object: broadcast its fields against each other
+                arrays.append([a.ravel() for a in np.broadcast_arrays(
+                    np.asarray(item["project"]),
+                    *(np.asarray(item.get(name, DEFAULTS[name]), dtype=float) for name in FIELDS))])
+            else:
+                # Plain scenario: collect as Python scalars, converted once below
+                scalars["project"].append(item["project"])
+                for name in FIELDS:
+                    scalars[name].append(item.get(name, DEFAULTS[name]))
+
+        columns = [[np.array(scalars["project"], dtype=object)] + [np.array(scalars[name], dtype=float)
+                                                                   for name in FIELDS]]
+        columns += arrays
+        try:
+            project = np.array([self.project_index[key]
+                                for key in np.concatenate([c[0] for c in columns]).tolist()], dtype=np.intp)
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Unknown project {e}. Choose from: {', '.join(self.projects.keys)}")
+        if not len(project):
+            raise ValueError("No scenarios in request")
+        values = tuple(np.concatenate([c[i] for c in columns]) for i in range(1, len(FIELDS) + 1))
+        for name, column in zip(FIELDS, values):
+            if not np.isfinite(column).all():
+                raise ValueError(f"'{name}' must be a finite number (got null, NaN or infinity)")
+            # Discounting is undefined at rate = -1; negative multipliers have no meaning
+            if name == "rate" and (column <= -1).any():
+                raise ValueError("'rate' must be greater than -1")
+            if name != "rate" and (column < 0).any():
+                raise ValueError(f"'{name}' must not be negative")
+        return (project,) + values
+
+    def annuity_factors(self, rate):
+        """Annuity factor per rate, computing only rates missing from the warm table"""
+        unique, inverse = np.unique(rate, return_inverse=True)
+        missing = [r for r in unique.tolist() if r not in self.annuity]
+        if missing:
+            if len(self.annuity) + len(missing) > self.max_table:
+                self.annuity.clear()  # Bound memory when clients send many distinct rates
+            self.annuity.update(zip(missing, utils.annuity_factor_array(np.array(missing), self.n).tolist()))
+        return np.array([self.annuity[r] for r in unique.tolist()])[inverse]
+
+    def evaluate(self, project, uptake, compliance, hw, rate):
+        """Scenario NPV (€ millions) for arrays of project indices and parameters"""
+        p = self.projects
+        capex, hw_share = p.capex[project], p.hw_share[project]
+        adj_capex = capex * (1 - hw_share) + capex * hw_share * hw
+        ann = self.annuity_factors(rate)
+        # Same expression as utils.npv_array, with the annuity factors taken from the table
+        return (p.benefit[project] * uptake * compliance * ann - (adj_capex + p.opex[project] * ann)) / 1e6
+
+    async def submit(self, columns):
+        """Queue one request's arrays; resolves to its NPVs once its batch is evaluated"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((columns, future, time.perf_counter()))
+        self._pending_size += len(columns[0])
+        if self._pending_size >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+        return await future
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending, self._pending_size = self._pending, [], 0
+        if not pending:
+            return
+        try:
+            merged = [np.concatenate([columns[i] for columns, _, _ in pending]) for i in range(len(FIELDS) + 1)]
+            npv = self.evaluate(*merged)
+        except Exception as e:
+            # Fail the whole batch rather than leave its requests waiting forever
+            for _, future, _ in pending:
+                if not future.cancelled():
+                    future.set_exception(e)
+            return
+
+        now = time.perf_counter()
+        offset = 0
+        for columns, future, submitted in pending:
+            size = len(columns[0])
+            if not future.cancelled():
+                future.set_result(npv[offset:offset + size])
+            offset += size
+            self.latencies.append(now - submitted)
+        self.requests += len(pending)
+        self.evaluations += len(npv)
+        self.batches += 1
+
+    def stats(self):
+        uptime = time.perf_counter() - self.started
+        latencies = np.array(self.latencies) * 1e3
+        return {
+            "uptime_s": uptime,
+            "requests": self.requests,
+            "evaluations": self.evaluations,
+            "batches": self.batches,
+            "mean_batch_size": self.evaluations / self.batches if self.batches else 0.0,
+            "evaluations_per_s": self.evaluations / uptime,
+            "requests_per_s": self.requests / uptime,
+            "latency_ms": ({f"p{q}": np.percentile(latencies, q).item() for q in (50, 90, 99)}
+                           if len(latencies) else {}),
+            "annuity_table_size": len(self.annuity)
+        }
+
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            500: "Internal Server Error"}
+
+
+async def _respond(writer, status, body):
+    data = json.dumps(body).encode()
+    writer.write(f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+
+
+async def handle_connection(evaluator, reader, writer):
+    """Minimal HTTP/1.1 with keep-alive: POST /evaluate and GET /stats"""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, path, _ = request_line.decode("latin1").split(" ", 2)
+            length = 0
+            close = False
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin1").partition(":")
+                name = name.strip().lower()
+                if name == "content-length":
+                    length = int(value)
+                elif name == "connection" and value.strip().lower() == "close":
+                    close = True
+            body = await reader.readexactly(length) if length else b""
+
+            if path == "/evaluate":
+                if method != "POST":
+                    await _respond(writer, 405, {"error": "Use POST"})
+                else:
+                    try:
+                        columns = evaluator.parse(json.loads(body))
+                    except (ValueError, TypeError) as e:
+                        await _respond(writer, 400, {"error": str(e)})
+                    else:
+                        try:
+                            npv = await evaluator.submit(columns)
+                        except Exception as e:
+                            await _respond(writer, 500, {"error": f"Evaluation failed: {e}"})
+                        else:
+                            await _respond(writer, 200, {"npv": npv.tolist()})
+            elif path == "/stats":
+                await _respond(writer, 200, evaluator.stats())
+            else:
+                await _respond(writer, 404, {"error": f"Unknown path {path}"})
+            if close:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass  # Client went away or sent a malformed request line
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8765, unix=None, window=0.002, max_batch=2**16):
+    evaluator = BatchEvaluator(window, max_batch)
+    evaluator.annuity_factors(np.array(list(utils.RATES.values())))  # Warm the table with the standard rates
+
+    def handler(reader, writer):
+        return handle_connection(evaluator, reader, writer)
+
+    if unix:
+        server = await asyncio.start_unix_server(handler, path=unix)
+    else:
+        server = await asyncio.start_server(handler, host, port)
+    where = unix or f"http://{host}:{port}"
+    print(f"Serving scenario NPVs on {where} (batch window {window * 1e3:g} ms)")
+    async with server:
+        await server.serve_forever()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve batched scenario NPV evaluations")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, metavar='PATH', help="Listen on a Unix socket instead of TCP")
+    parser.add_argument('--window-ms', type=float, default=2.0, help="Batching window in milliseconds")
+    parser.add_argument('--max-batch', type=int, default=2**16, help="Evaluate at once when this many are queued")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.window_ms / 1e3, args.max_batch))
+    except KeyboardInterrupt:
+        pass
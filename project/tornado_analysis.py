@@ -1,15 +1,19 @@
 import matplotlib.pyplot as plt
 import numpy as np
-from utils import tornado_data
+from matplotlib.patches import Patch
+from utils import INTEGER_INPUTS, PROJECTS, SENSITIVITY_BASE, SENSITIVITY_PARAMETERS, sensitivity_curves, tornado_data
+
+# Bootstrap replicates behind the Sobol index error bars
+SOBOL_BOOTSTRAP = 200
 
 def plot_tornado(project="MACRO1"):
     """Create tornado diagram for sensitivity analysis of the given project"""
-    results, base_m1, base_m2 = tornado_data()
+    results, base = tornado_data()
     
     # Get data for the selected project
     project_data = results[project]
-    base_npv = base_m1 if project == "MACRO1" else base_m2
-    project_name = "Patient-Specific VC" if project == "MACRO1" else "Hospital Sim & Ed"
+    base_npv = base[project]
+    project_name = PROJECTS.row(project)["label"]
     
     # Sort parameters by impact range
     parameters = []
@@ -35,23 +39,25 @@ def plot_tornado(project="MACRO1"):
     # Set up y-axis
     y_pos = np.arange(len(parameters))
     
-    # Plot horizontal bars
-    ax.barh(y_pos, high_values, left=0, height=0.4, color='#4CAF50', alpha=0.7, label='Positive Impact')
-    ax.barh(y_pos, low_values, left=0, height=0.4, color='#F44336', alpha=0.7, label='Negative Impact')
+    # Plot horizontal bars, colored by the sign of the change (a higher cost,
+    # rate or hardware factor lowers NPV, so its high end is the negative bar)
+    swings = np.array([low_values, high_values])
+    colors = np.where(swings >= 0, '#4CAF50', '#F44336')
+    for values, bar_colors in zip(swings, colors):
+        ax.barh(y_pos, values, left=0, height=0.4, color=bar_colors, alpha=0.7)
     
-    # Add parameter labels with larger font
+    # Add parameter labels, with the tested range, with larger font
     ax.set_yticks(y_pos)
-    ax.set_yticklabels(parameters, fontsize=12)
+    ax.set_yticklabels([f'{param}\n({SENSITIVITY_PARAMETERS[param][1]:g} to {SENSITIVITY_PARAMETERS[param][2]:g})'
+                        for param in parameters], fontsize=12)
     
     # Add value labels on bars with larger font
     for i, (low, high) in enumerate(zip(low_values, high_values)):
-        # Format the values with 2 decimal places
-        if low < 0:
-            ax.text(low - 0.05, i, f'{low:.2f}', ha='right', va='center', 
-                   color='black', fontweight='bold', fontsize=12)
-        if high > 0:
-            ax.text(high + 0.05, i, f'+{high:.2f}', ha='left', va='center', 
-                   color='black', fontweight='bold', fontsize=12)
+        # Format the values with 2 decimal places, beyond the end of each bar
+        for value in (low, high):
+            ax.text(value + (0.05 if value >= 0 else -0.05), i, f'{value:+.2f}',
+                    ha='left' if value >= 0 else 'right', va='center',
+                    color='black', fontweight='bold', fontsize=12)
     
     # Add vertical line at zero (base case)
     ax.axvline(x=0, color='black', linestyle='-', alpha=0.7, linewidth=1)
@@ -68,11 +74,13 @@ def plot_tornado(project="MACRO1"):
     ax.tick_params(axis='x', labelsize=12)
     
     # Determine xlim based on data
-    max_abs_impact = max(max(abs(min(low_values)), abs(max(high_values))), 0.5)
+    max_abs_impact = max(np.abs(swings).max(), 0.5)
     ax.set_xlim(-max_abs_impact * 1.2, max_abs_impact * 1.2)
     
     # Legend with larger font
-    ax.legend(loc='upper left', fontsize=12)
+    ax.legend(handles=[Patch(color='#4CAF50', alpha=0.7, label='Positive Impact'),
+                       Patch(color='#F44336', alpha=0.7, label='Negative Impact')],
+              loc='upper left', fontsize=12)
     ax.grid(axis='x', linestyle='--', alpha=0.3)
     
     # Customize spines
@@ -85,14 +93,9 @@ def plot_tornado(project="MACRO1"):
 
 def plot_waterfall_chart(project="MACRO1"):
     """Create waterfall chart showing contribution of each factor to NPV"""
-    from utils import MACRO1, MACRO2, scenario_npv
+    from utils import scenario_npv
     
-    if project == "MACRO1":
-        project_data = MACRO1
-        project_name = "Patient-Specific VC"
-    else:
-        project_data = MACRO2
-        project_name = "Hospital Sim & Ed"
+    project_name = PROJECTS.row(project)["label"]
     
     # Baseline with minimal values
     base_npv = scenario_npv(project, 0.6, 0.7, 1.2)  # Pessimistic starting point
@@ -185,3 +188,130 @@ def plot_waterfall_chart(project="MACRO1"):
     plt.tight_layout(rect=[0, 0.08, 1, 0.98])
     
     return fig
+
+def plot_sobol_indices(project="MACRO1"):
+    """Create bar chart of first- and total-order Sobol indices for the given project"""
+    from global_sensitivity import PARAMETER_LABELS, cached_sobol_indices
+    
+    results = cached_sobol_indices(n_bootstrap=SOBOL_BOOTSTRAP)
+    p = results["projects"].index(project)
+    project_name = PROJECTS.row(project)["label"]
+    
+    # Sort parameters by total-order index
+    order = np.argsort(results["ST"][p])[::-1]
+    parameters = [PARAMETER_LABELS[results["parameters"][i]] for i in order]
+    first, total = results["S1"][p, order], results["ST"][p, order]
+    first_conf, total_conf = results["S1_conf"][p, order], results["ST_conf"][p, order]
+    
+    fig, ax = plt.subplots(figsize=(14, 8))
+    
+    y_pos = np.arange(len(parameters))
+    height = 0.35
+    
+    # Error bars from the bootstrap confidence intervals
+    first_err = np.abs(first_conf - first[:, None]).T
+    total_err = np.abs(total_conf - total[:, None]).T
+    ax.barh(y_pos - height/2, first, height=height, xerr=first_err, color='#2196F3', alpha=0.8,
+            capsize=4, label='First-order (S1)')
+    ax.barh(y_pos + height/2, total, height=height, xerr=total_err, color='#9C27B0', alpha=0.8,
+            capsize=4, label='Total-order (ST)')
+    
+    # Add value labels on bars with larger font,
+    # placed beyond the upper end of each interval
+    for i, (s1, st) in enumerate(zip(first, total)):
+        ax.text(max(first_conf[i, 1], s1, 0) + 0.02, i - height/2, f'{s1:.3f}', va='center',
+                fontweight='bold', fontsize=12)
+        ax.text(max(total_conf[i, 1], st, 0) + 0.02, i + height/2, f'{st:.3f}', va='center',
+                fontweight='bold', fontsize=12)
+    
+    ax.set_yticks(y_pos)
+    ax.set_yticklabels(parameters, fontsize=12)
+    ax.invert_yaxis()
+    
+    # Customize plot with larger fonts
+    ax.set_title(f'Sobol Sensitivity Indices - NPV Variance ({project_name})', 
+                 fontsize=16, pad=20)
+    ax.set_xlabel('Share of NPV variance', fontsize=14)
+    ax.tick_params(axis='x', labelsize=12)
+    ax.set_xlim(0, 1.1)
+    
+    ax.legend(loc='lower right', fontsize=12)
+    ax.grid(axis='x', linestyle='--', alpha=0.3)
+    
+    # Customize spines
+    for spine in ['top', 'right']:
+        ax.spines[spine].set_visible(False)
+    
+    # Add explanatory text
+    footnote = (f"{results['n_evaluations']:,} model evaluations (Saltelli design); "
+                "error bars are 95% bootstrap intervals. ST - S1 measures interaction effects.")
+    fig.text(0.1, 0.01, footnote, fontsize=10, va='bottom', ha='left')
+    
+    plt.tight_layout(rect=[0, 0.04, 1, 0.98])
+    
+    return fig
+
+def plot_sensitivity_spider(points=200):
+    """Spider curves: NPV of every project across the full range of each parameter in turn
+
+    The dashed chord joins the two endpoints a tornado diagram uses, so any
+    gap between it and the curve is nonlinearity the tornado cannot show.
+    """
+    from scenario_charts import project_style
+    
+    curves = sensitivity_curves(points=points)
+    n_params = len(curves["parameters"])
+    n_cols = 4
+    n_rows = -(-(n_params + 1) // n_cols)  # One spare panel for the legend
+    
+    fig, axes = plt.subplots(n_rows, n_cols, figsize=(22, 6 * n_rows), sharey=True)
+    axes = axes.ravel()
+    
+    for i, param in enumerate(curves["parameters"]):
+        ax = axes[i]
+        grid = curves["grid"][i]
+        name = SENSITIVITY_PARAMETERS[param][0]
+        scale = 100 if name == "rate" else 1  # Show the discount rate in percent
+        # Whole-valued inputs (the horizon) are drawn only at the values they can take
+        integer = name in INTEGER_INPUTS
+        keep = np.unique(grid, return_index=True)[1] if integer else slice(None)
+        for p, key in enumerate(curves["projects"]):
+            color, marker = project_style(p)
+            npv = curves["npv"][p, i]
+            ax.plot(grid[keep] * scale, npv[keep], '-', marker='.' if integer else None, markersize=10,
+                    color=color, linewidth=2.5, label=PROJECTS.row(key)["label"])
+            ax.plot(grid[[0, -1]] * scale, npv[[0, -1]], '--', color=color, linewidth=1, alpha=0.7)
+            ax.plot(grid[[0, -1]] * scale, npv[[0, -1]], marker, color=color, markersize=8,
+                    markeredgecolor='black')
+            ax.axhline(y=curves["base"][p], color=color, linestyle=':', linewidth=1, alpha=0.6)
+        
+        ax.axvline(x=SENSITIVITY_BASE[name] * scale, color='gray', linestyle='--', alpha=0.5)
+        ax.axhline(y=0, color='black', linestyle='-', linewidth=0.7, alpha=0.5)
+        ax.set_title(param, fontsize=16)
+        ax.set_xlabel({"rate": 'Discount rate (%)', "horizon": 'Years'}.get(name, 'Value'), fontsize=13)
+        ax.tick_params(axis='both', labelsize=12)
+        ax.grid(linestyle='--', alpha=0.3)
+        if i % n_cols == 0:
+            ax.set_ylabel('NPV (€ millions)', fontsize=14)
+        for spine in ['top', 'right']:
+            ax.spines[spine].set_visible(False)
+    
+    # Legend and key in the first spare panel; hide the rest
+    legend_ax = axes[n_params]
+    handles, labels = axes[0].get_legend_handles_labels()
+    handles += [plt.Line2D([], [], color='black', linestyle='--', linewidth=1),
+                plt.Line2D([], [], color='black', linestyle=':', linewidth=1),
+                plt.Line2D([], [], color='gray', linestyle='--', alpha=0.5)]
+    labels += ['Endpoints only (tornado)', 'Base case NPV', 'Base value']
+    legend_ax.legend(handles, labels, loc='center', fontsize=14, frameon=False)
+    for ax in axes[n_params:]:
+        ax.axis('off')
+    
+    fig.suptitle('Spider Plot - One-at-a-Time NPV Sensitivity', fontsize=20)
+    fig.text(0.01, 0.01, f"{points} points per parameter (whole years for the horizon), "
+             "other parameters at their base value "
+             f"({SENSITIVITY_BASE['rate']:.1%} discount rate, {SENSITIVITY_BASE['horizon']}-year horizon).",
+             fontsize=11, va='bottom', ha='left')
+    plt.tight_layout(rect=[0, 0.03, 1, 0.96])
+    
+    return fig
@@ -1,5 +1,8 @@
+import csv
+
 import numpy as np
-import pandas as pd
+
+from discount import DiscountCurve
 
 # Discount rates in real terms
 RATES = {
@@ -15,6 +18,7 @@ N_YEARS = 15
 # Project parameters
 MACRO1 = {
     "name": "Patient-Specific Virtual Care",
+    "label": "Patient-Specific VC",
     "capex": 121_900,
     "opex": 79_800,
     "benefit": 1_389_166.7,
@@ -23,6 +27,7 @@ MACRO1 = {
 
 MACRO2 = {
     "name": "Hospital Simulation & Education",
+    "label": "Hospital Sim & Ed",
     "capex": 1_145_300,
     "opex": 166_000,
     "benefit": 2_876_333,
@@ -30,148 +35,512 @@ MACRO2 = {
 }
 
 
+class ProjectTable:
+    """Columnar (structure-of-arrays) table of candidate investments
+
+    keys, names and labels are lists; capex, opex, benefit and hw_share are
+    float arrays with one entry per project, in the same order.
+    """
+
+    FIELDS = ("capex", "opex", "benefit", "hw_share")
+
+    def __init__(self, keys, names, labels, capex, opex, benefit, hw_share):
+        self.keys = list(keys)
+        self.names = list(names)
+        self.labels = list(labels)
+        self.capex = np.asarray(capex, dtype=float)
+        self.opex = np.asarray(opex, dtype=float)
+        self.benefit = np.asarray(benefit, dtype=float)
+        self.hw_share = np.asarray(hw_share, dtype=float)
+        self._index = {key: i for i, key in enumerate(self.keys)}
+
+    @classmethod
+    def from_dicts(cls, projects):
+        """Build from a {key: project dict} mapping such as {"MACRO1": MACRO1}"""
+        rows = list(projects.values())
+        return cls(projects.keys(),
+                   [p["name"] for p in rows],
+                   [p.get("label", p["name"]) for p in rows],
+                   *([p[field] for p in rows] for field in cls.FIELDS))
+
+    @classmethod
+    def from_csv(cls, path):
+        """Load a CSV with columns key, name, capex, opex, benefit, hw_share (and optionally label)"""
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        return cls.from_dicts({
+            row["key"]: dict(row, **{field: float(row[field]) for field in cls.FIELDS})
+            for row in rows
+        })
+
+    def to_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("key", "name", "label") + self.FIELDS)
+            for i, key in enumerate(self.keys):
+                writer.writerow([key, self.names[i], self.labels[i]] + [getattr(self, f)[i] for f in self.FIELDS])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def index(self, key):
+        """Row number of a project key"""
+        if key not in self._index:
+            raise KeyError(f"Unknown project '{key}'. Available: {', '.join(self.keys)}")
+        return self._index[key]
+
+    def row(self, key):
+        """Project parameters as a dict (same layout as MACRO1/MACRO2)"""
+        i = self.index(key)
+        project = {"name": self.names[i], "label": self.labels[i]}
+        project.update({field: getattr(self, field)[i].item() for field in self.FIELDS})
+        return project
+
+    def select(self, keys):
+        """Sub-table with the given project keys, in that order"""
+        idx = [self.index(key) for key in keys]
+        return ProjectTable([self.keys[i] for i in idx], [self.names[i] for i in idx],
+                            [self.labels[i] for i in idx], *(getattr(self, f)[idx] for f in self.FIELDS))
+
+
+# Projects evaluated by default; replace with ProjectTable.from_csv(...) to analyse others
+PROJECTS = ProjectTable.from_dicts({"MACRO1": MACRO1, "MACRO2": MACRO2})
+
+# Scenario multipliers: (uptake, compliance, hardware cost factor)
+SCENARIOS = {
+    "Optimistic": (1.20, 1.30, 0.75),
+    "Expected": (1.00, 1.00, 1.00),
+    "Pessimistic": (0.60, 0.50, 1.10)
+}
+
+
+# Below this |rate| the closed-form annuity is replaced by its r -> 0 expansion
+_SMALL_RATE = 1e-8
+
+
+def _curve_annuity(curve, n, *arrays):
+    """Annuity of a DiscountCurve family with the arrays it multiplies, laid out with the curve axes trailing
+
+    Returns (arrays, annuity): the arrays and n are broadcast together to a
+    shape B, the arrays gain one unit axis per curve axis and the annuity
+    has shape B + the family's shape.
+    """
+    *arrays, n = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in arrays), np.asarray(n))
+    k = len(curve.shape)
+    ann = np.moveaxis(curve.annuity(n), range(k), range(n.ndim, n.ndim + k))
+    expand = (Ellipsis,) + (None,) * k
+    return [a[expand] for a in arrays], ann
+
+
+def annuity_factor_array(r, n):
+    """Closed-form annuity factor, broadcast over arrays of rates and horizons
+
+    r may also be a DiscountCurve, whose cached per-year factors are summed
+    instead; the result then has n's shape + the curve family's shape (curve
+    axes always trail the inputs' axes, in every function below).
+    """
+    if isinstance(r, DiscountCurve):
+        return _curve_annuity(r, n)[1]
+    r = np.asarray(r, dtype=float)
+    n = np.asarray(n, dtype=float)
+    small = np.abs(r) < _SMALL_RATE
+    safe_r = np.where(small, 1.0, r)
+    # (1 - (1 + r)^-n) / r, written with expm1/log1p to stay accurate near r = 0
+    closed = -np.expm1(-n * np.log1p(safe_r)) / safe_r
+    limit = n - n * (n + 1) / 2 * r
+    return np.where(small, limit, closed)
+
+
+def _annuity_for(rate, n, capex, opex, benefit):
+    """(capex, opex, benefit, annuity) ready to combine, for a rate array or a DiscountCurve family"""
+    if isinstance(rate, DiscountCurve):
+        (capex, opex, benefit), ann = _curve_annuity(rate, n, capex, opex, benefit)
+        return capex, opex, benefit, ann
+    return capex, opex, benefit, annuity_factor_array(rate, n)
+
+
+def npv_array(capex, opex, benefit, rate, n=N_YEARS):
+    """NPV broadcast over arrays of capex, opex, benefit, rate and horizon"""
+    capex, opex, benefit, ann = _annuity_for(rate, n, capex, opex, benefit)
+    return benefit * ann - (capex + opex * ann)
+
+
+def bcr_array(capex, opex, benefit, rate, n=N_YEARS):
+    """Benefit-Cost Ratio broadcast over arrays of capex, opex, benefit, rate and horizon"""
+    capex, opex, benefit, ann = _annuity_for(rate, n, capex, opex, benefit)
+    return (benefit * ann) / (capex + opex * ann)
+
+
+def get_project(macro, projects=None):
+    """Project parameter dict for a project key"""
+    return (projects or PROJECTS).row(macro)
+
+
+def adjusted_capex(project, hw):
+    """CAPEX with the hardware share scaled by the hardware cost factor"""
+    return project["capex"] * (1 - project["hw_share"]) + project["capex"] * project["hw_share"] * hw
+
+
+def scenario_npv_array(macro, uptake, comp, hw, rate=0.008, n=N_YEARS):
+    """Scenario NPV in € millions, broadcast over uptake, compliance, hardware, rate and horizon"""
+    project = get_project(macro)
+    adj_capex = adjusted_capex(project, np.asarray(hw, dtype=float))
+    adj_benefit = project["benefit"] * np.asarray(uptake, dtype=float) * comp
+    return npv_array(adj_capex, project["opex"], adj_benefit, rate, n) / 1e6
+
+
+def portfolio_npv(uptake, comp, hw, rate=0.008, n=N_YEARS, projects=None):
+    """Scenario NPV (€ millions) for every project: shape (projects,) + broadcast shape of the inputs"""
+    projects = projects or PROJECTS
+    if isinstance(rate, DiscountCurve):
+        # Curve families add trailing axes: (projects,) + inputs shape + curve shape
+        (uptake, comp, hw), ann = _curve_annuity(rate, n, uptake, comp, hw)
+    else:
+        uptake, comp, hw, rate, n = np.broadcast_arrays(
+            *(np.asarray(x, dtype=float) for x in (uptake, comp, hw, rate, n)))
+        ann = annuity_factor_array(rate, n)
+    col = (slice(None),) + (None,) * uptake.ndim
+    capex = projects.capex[col]
+    adj_capex = capex * (1 - projects.hw_share[col]) + capex * projects.hw_share[col] * hw
+    adj_benefit = projects.benefit[col] * uptake * comp
+    return (adj_benefit * ann - (adj_capex + projects.opex[col] * ann)) / 1e6
+
+
+def npv_surface(rates, horizons, projects=None):
+    """Base-case NPV (€ millions) on a project x rate x horizon grid in one call"""
+    rates = np.asarray(rates, dtype=float)[:, None]
+    horizons = np.asarray(horizons, dtype=float)[None, :]
+    return portfolio_npv(1.0, 1.0, 1.0, rates, horizons, projects)
+
+
 def annuity_factor(r, n):
     """Present value of €1 annuity for n years at rate r"""
-    return sum(1 / (1 + r) ** t for t in range(1, n + 1))
+    return annuity_factor_array(r, n)[()]
 
 
 def npv(capex, opex, benefit, rate, n=N_YEARS):
     """Calculate NPV at given discount rate"""
-    ann = annuity_factor(rate, n)
-    return benefit * ann - (capex + opex * ann)
+    return npv_array(capex, opex, benefit, rate, n)[()]
+
+
+def _annuity_derivative(r, n):
+    """d/dr of the annuity factor, broadcast like annuity_factor_array"""
+    r = np.asarray(r, dtype=float)
+    small = np.abs(r) < 1e-6
+    safe_r = np.where(small, 1.0, r)
+    closed = (n * (1 + safe_r) ** (-n - 1) - annuity_factor_array(safe_r, n)) / safe_r
+    return np.where(small, -n * (n + 1) / 2, closed)
+
+
+def irr_array(capex=None, opex=None, benefit=None, n=N_YEARS, cashflows=None, curve=None,
+              tol=1e-10, max_iter=100, low=-0.99, high=1.0, guess=0.1):
+    """Vectorized IRR for many lanes: returns (rates, converged, iterations)
+
+    Lanes are given either as flat capex/opex/benefit arrays over n years, or as
+    a (lanes, years + 1) cashflows matrix whose column 0 is the t=0 flow.
+    Each lane takes a Newton step inside a sign-change bracket and falls back
+    to bisection when the step leaves the bracket or the derivative vanishes.
+    Lanes without a root in the bracket return NaN with converged=False.
+    guess (a scalar or one value per lane) is the first iterate, clipped to
+    the bracket.
+
+    With a (single) DiscountCurve, the solved rate is the parallel spread over
+    the curve at which NPV = 0; against a zero curve this is the plain IRR.
+    """
+    if curve is not None and curve.shape != ():
+        raise ValueError(f"irr accepts a single DiscountCurve, not a family of shape {curve.shape}; "
+                         "solve each curve separately")
+    lane_shape = None
+    if curve is not None and cashflows is None:
+        capex, opex, benefit = np.broadcast_arrays(
+            *(np.asarray(x, dtype=float) for x in (capex, opex, benefit)))
+        lane_shape = capex.shape
+        cashflows = np.repeat((benefit - opex).reshape(-1, 1), int(n) + 1, axis=1)
+        cashflows[:, 0] = -capex.ravel()
+
+    if cashflows is not None:
+        cashflows = np.atleast_2d(np.asarray(cashflows, dtype=float))
+        t = np.arange(cashflows.shape[1], dtype=float)
+
+        if curve is None:
+            def f_df(r, idx):
+                cf = cashflows[idx]
+                disc = (1 + r[:, None]) ** -t
+                pv = np.sum(cf * disc, axis=1)
+                d_pv = np.sum(-t * cf * disc, axis=1) / (1 + r)
+                return pv, d_pv
+        else:
+            year_rates = curve.rates(cashflows.shape[1] - 1)
+
+            def f_df(r, idx):
+                cf = cashflows[idx]
+                growth = 1 / (1 + year_rates + r[:, None])
+                disc = np.cumprod(growth, axis=1)
+                pv = cf[:, 0] + np.sum(cf[:, 1:] * disc, axis=1)
+                d_pv = -np.sum(cf[:, 1:] * disc * np.cumsum(growth, axis=1), axis=1)
+                return pv, d_pv
+
+        shape = cashflows.shape[:1] if lane_shape is None else lane_shape
+    else:
+        capex, opex, benefit, n = np.broadcast_arrays(
+            *(np.asarray(x, dtype=float) for x in (capex, opex, benefit, n)))
+        shape = capex.shape
+        capex, net, n = capex.ravel(), (benefit - opex).ravel(), n.ravel()
+
+        def f_df(r, idx):
+            pv = -capex[idx] + net[idx] * annuity_factor_array(r, n[idx])
+            return pv, net[idx] * _annuity_derivative(r, n[idx])
 
+    size = int(np.prod(shape))
+    all_idx = np.arange(size)
+    lo = np.full(size, float(low))
+    hi = np.full(size, float(high))
+    f_lo, _ = f_df(lo, all_idx)
+    f_hi, _ = f_df(hi, all_idx)
 
-def irr(capex, opex, benefit, n=N_YEARS, guess=0.1):
-    """Newton-Raphson IRR calculation on equal annual net benefit"""
-    r = guess
-    for _ in range(100):
-        pv, d_pv = -capex, 0
-        for t in range(1, n + 1):
-            cf = benefit - opex
-            pv += cf / (1 + r) ** t
-            d_pv += -t * cf / (1 + r) ** (t + 1)
-        r_new = r - pv / d_pv
-        if abs(r_new - r) < 1e-10:
+    # Widen the upper end until the bracket holds a sign change (or gives up)
+    for _ in range(60):
+        widen = np.sign(f_lo) == np.sign(f_hi)
+        if not widen.any():
             break
-        r = r_new
-    return r
+        hi[widen] *= 2
+        f_hi[widen], _ = f_df(hi[widen], all_idx[widen])
+
+    rates = np.full(size, np.nan)
+    converged = np.zeros(size, dtype=bool)
+    iterations = np.zeros(size, dtype=int)
+
+    active = np.flatnonzero(np.sign(f_lo) != np.sign(f_hi))
+    r = np.clip(np.broadcast_to(np.asarray(guess, dtype=float), shape).ravel()[active], lo[active], hi[active])
+    for it in range(1, max_iter + 1):
+        if active.size == 0:
+            break
+        pv, d_pv = f_df(r, active)
+
+        # Shrink the bracket around the root
+        same_as_lo = np.sign(pv) == np.sign(f_lo[active])
+        lo[active] = np.where(same_as_lo, r, lo[active])
+        hi[active] = np.where(same_as_lo, hi[active], r)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r_new = r - pv / d_pv
+        bad = ~np.isfinite(r_new) | (r_new <= lo[active]) | (r_new >= hi[active])
+        r_new = np.where(bad, (lo[active] + hi[active]) / 2, r_new)
+
+        done = (np.abs(r_new - r) < tol) | (hi[active] - lo[active] < tol) | (pv == 0)
+        iterations[active] = it
+        rates[active[done]] = np.where(pv[done] == 0, r[done], r_new[done])
+        converged[active[done]] = True
+
+        active, r = active[~done], r_new[~done]
+
+    # Lanes that ran out of iterations report their last iterate
+    rates[active] = r
+    return rates.reshape(shape), converged.reshape(shape), iterations.reshape(shape)
+
+
+def irr(capex, opex, benefit, n=N_YEARS, guess=0.1, curve=None):
+    """Newton-Raphson IRR calculation on equal annual net benefit (spread over curve if given)"""
+    return irr_array(capex, opex, benefit, n, curve=curve, guess=guess)[0][()]
 
 
 def bcr(capex, opex, benefit, rate, n=N_YEARS):
     """Calculate Benefit-Cost Ratio"""
-    ann = annuity_factor(rate, n)
-    return (benefit * ann) / (capex + opex * ann)
+    return bcr_array(capex, opex, benefit, rate, n)[()]
 
 
 def scenario_npv(macro, uptake, comp, hw, rate=0.008):
     """Calculate NPV for a scenario with specific parameters"""
-    if macro == "MACRO1":
-        project = MACRO1
-    else:
-        project = MACRO2
-    
-    # Adjust CAPEX for hardware factors
-    if macro == "MACRO1":
-        # For MACRO1, all CAPEX is hardware
-        adj_capex = project["capex"] * hw
-    else:
-        # For MACRO2, split CAPEX into hardware vs non-hardware
-        adj_capex = project["capex"] * (1 - project["hw_share"]) + project["capex"] * project["hw_share"] * hw
-    
-    # Adjust benefits for uptake and compliance
-    adj_benefit = project["benefit"] * uptake * comp
-    
-    return npv(adj_capex, project["opex"], adj_benefit, rate) / 1e6  # Return in € millions
+    return scenario_npv_array(macro, uptake, comp, hw, rate)[()]  # Return in € millions
+
+
+def evaluate_portfolio(projects=None, scenarios=None, rates=None, n=N_YEARS):
+    """NPV, BCR and IRR for every project x scenario x rate in one vectorized pass
+
+    Returns a dict with "npv" (€ millions) and "bcr" of shape
+    (projects, scenarios, rates), "irr" of shape (projects, scenarios) and the
+    project keys, scenario names and rates along each axis.
+    """
+    projects = projects or PROJECTS
+    scenarios = scenarios or SCENARIOS
+    rates = RATES if rates is None else rates
+    rate_values = np.asarray(list(rates.values()) if isinstance(rates, dict) else rates, dtype=float)
+
+    uptake, comp, hw = (np.array(x)[None, :] for x in zip(*scenarios.values()))
+    capex = projects.capex[:, None]
+    adj_capex = capex * (1 - projects.hw_share[:, None]) + capex * projects.hw_share[:, None] * hw
+    adj_benefit = projects.benefit[:, None] * uptake * comp
+    opex = projects.opex[:, None]
+
+    npv_values = npv_array(adj_capex[..., None], opex[..., None], adj_benefit[..., None], rate_values, n) / 1e6
+    bcr_values = bcr_array(adj_capex[..., None], opex[..., None], adj_benefit[..., None], rate_values, n)
+    irr_values = irr_array(adj_capex, opex, adj_benefit, n)[0]
+
+    return {
+        "projects": list(projects.keys),
+        "scenarios": list(scenarios),
+        "rates": rate_values,
+        "npv": npv_values,
+        "bcr": bcr_values,
+        "irr": irr_values
+    }
 
 
-def get_scenario_data():
+def get_scenario_data(projects=None):
     """Get NPV results for the three scenarios"""
-    optimistic_1 = scenario_npv("MACRO1", 1.20, 1.30, 0.75)
-    optimistic_2 = scenario_npv("MACRO2", 1.20, 1.30, 0.75)
-    
-    expected_1 = scenario_npv("MACRO1", 1.00, 1.00, 1.00)
-    expected_2 = scenario_npv("MACRO2", 1.00, 1.00, 1.00)
-    
-    pessimistic_1 = scenario_npv("MACRO1", 0.60, 0.50, 1.10)
-    pessimistic_2 = scenario_npv("MACRO2", 0.60, 0.50, 1.10)
-    
+    result = evaluate_portfolio(projects, rates=[0.008])
+    return {
+        key: {scenario: result["npv"][p, s, 0].item() for s, scenario in enumerate(result["scenarios"])}
+        for p, key in enumerate(result["projects"])
+    }
+
+
+# One-at-a-time sensitivity: parameter label -> (input, low, high). Inputs are
+# the scenario multipliers (uptake, compliance, hw), multipliers of the project
+# costs (capex, opex) and benefit, the discount rate and the horizon in years;
+# each is held at its SENSITIVITY_BASE value while another one varies.
+SENSITIVITY_PARAMETERS = {
+    "Uptake Rate": ("uptake", 0.6, 1.2),
+    "Compliance Factor": ("compliance", 0.7, 1.3),
+    "Hardware Cost Factor": ("hw", 0.8, 1.2),
+    "CAPEX": ("capex", 0.8, 1.2),
+    "OPEX": ("opex", 0.8, 1.2),
+    "Discount Rate": ("rate", 0.0, 0.057),
+    "Time Horizon (years)": ("horizon", 10, 20)
+}
+
+SENSITIVITY_BASE = {"uptake": 1.0, "compliance": 1.0, "hw": 1.0, "capex": 1.0, "opex": 1.0, "benefit": 1.0,
+                    "rate": 0.008, "horizon": N_YEARS}
+
+# Inputs that only take whole values (cash flows are annual), so their grid is
+# rounded instead of running through points the model has no meaning for
+INTEGER_INPUTS = {"horizon"}
+
+
+def sensitivity_curves(parameters=None, points=200, projects=None):
+    """NPV of every project along a dense grid of each parameter, others at their base value
+
+    parameters maps labels to (input, low, high) as in SENSITIVITY_PARAMETERS.
+    All parameters and projects are evaluated in one vectorized pass. Returns a
+    dict with "parameters", "projects", "grid" (parameters, points) of input
+    values (rounded, so with repeats, for INTEGER_INPUTS), "npv" (projects, parameters, points) in € millions, "base"
+    (projects,) and "swings" (projects, parameters, 2): the change from the
+    base NPV at the low and high end of each range.
+    """
+    projects = projects or PROJECTS
+    parameters = SENSITIVITY_PARAMETERS if parameters is None else parameters
+    unknown = {spec[0] for spec in parameters.values()} - set(SENSITIVITY_BASE)
+    if unknown:
+        raise ValueError(f"Unknown inputs {sorted(unknown)}. Choose from: {', '.join(SENSITIVITY_BASE)}")
+
+    grid = np.array([np.round(np.linspace(low, high, points)) if name in INTEGER_INPUTS
+                     else np.linspace(low, high, points)
+                     for name, low, high in parameters.values()]).reshape(-1, points)
+    # Column 0 is the base case; then every grid point of every parameter
+    inputs = {name: np.full(1 + grid.size, float(base)) for name, base in SENSITIVITY_BASE.items()}
+    for i, (name, _, _) in enumerate(parameters.values()):
+        inputs[name][1 + i * points:1 + (i + 1) * points] = grid[i]
+
+    col = (slice(None), None)
+    capex = projects.capex[col] * inputs["capex"]
+    adj_capex = capex * (1 - projects.hw_share[col]) + capex * projects.hw_share[col] * inputs["hw"]
+    adj_benefit = projects.benefit[col] * inputs["benefit"] * inputs["uptake"] * inputs["compliance"]
+    values = npv_array(adj_capex, projects.opex[col] * inputs["opex"], adj_benefit,
+                       inputs["rate"], inputs["horizon"]) / 1e6
+
+    base = values[:, 0]
+    npv_values = values[:, 1:].reshape(len(projects), len(parameters), points)
     return {
-        "MACRO1": {
-            "Optimistic": optimistic_1,
-            "Expected": expected_1,
-            "Pessimistic": pessimistic_1
-        },
-        "MACRO2": {
-            "Optimistic": optimistic_2,
-            "Expected": expected_2,
-            "Pessimistic": pessimistic_2
-        }
+        "parameters": list(parameters),
+        "projects": list(projects.keys),
+        "grid": grid,
+        "npv": npv_values,
+        "base": base,
+        "swings": npv_values[:, :, [0, -1]] - base[:, None, None]
     }
 
 
-def tornado_data():
-    """Generate data for tornado diagram by varying each parameter individually"""
-    # Base case
-    base_m1 = scenario_npv("MACRO1", 1.0, 1.0, 1.0)
-    base_m2 = scenario_npv("MACRO2", 1.0, 1.0, 1.0)
-    
-    # Parameter variations (low, high)
-    variations = {
-        "Uptake Rate": (0.6, 1.2),
-        "Compliance Factor": (0.7, 1.3),
-        "Hardware Cost Factor": (0.8, 1.2)
+def tornado_data(projects=None, parameters=None):
+    """Generate data for tornado diagram by varying each parameter individually
+
+    Returns ({project: {param: (low - base, high - base)}}, {project: base NPV}).
+    """
+    curves = sensitivity_curves(parameters, points=2, projects=projects)
+    results = {
+        key: {param: tuple(curves["swings"][p, i].tolist()) for i, param in enumerate(curves["parameters"])}
+        for p, key in enumerate(curves["projects"])
     }
-    
-    results = {"MACRO1": {}, "MACRO2": {}}
-    
-    for param, (low, high) in variations.items():
-        # For each parameter, hold others constant at base value
-        if param == "Uptake Rate":
-            low_m1 = scenario_npv("MACRO1", low, 1.0, 1.0)
-            high_m1 = scenario_npv("MACRO1", high, 1.0, 1.0)
-            low_m2 = scenario_npv("MACRO2", low, 1.0, 1.0)
-            high_m2 = scenario_npv("MACRO2", high, 1.0, 1.0)
-        elif param == "Compliance Factor":
-            low_m1 = scenario_npv("MACRO1", 1.0, low, 1.0)
-            high_m1 = scenario_npv("MACRO1", 1.0, high, 1.0)
-            low_m2 = scenario_npv("MACRO2", 1.0, low, 1.0)
-            high_m2 = scenario_npv("MACRO2", 1.0, high, 1.0)
-        elif param == "Hardware Cost Factor":
-            low_m1 = scenario_npv("MACRO1", 1.0, 1.0, low)
-            high_m1 = scenario_npv("MACRO1", 1.0, 1.0, high)
-            low_m2 = scenario_npv("MACRO2", 1.0, 1.0, low)
-            high_m2 = scenario_npv("MACRO2", 1.0, 1.0, high)
-        
-        results["MACRO1"][param] = (low_m1 - base_m1, high_m1 - base_m1)
-        results["MACRO2"][param] = (low_m2 - base_m2, high_m2 - base_m2)
-    
-    return results, base_m1, base_m2
+    base = {key: curves["base"][p].item() for p, key in enumerate(curves["projects"])}
+    return results, base
+
+
+# Monte Carlo input distributions (triangular and truncated normal)
+MC_DISTRIBUTIONS = {
+    "Uptake": ("triangular", 0.4, 0.8, 1.2),
+    "Compliance": ("triangular", 0.8, 1.0, 1.3),
+    "HW_Factor": ("truncnorm", 1.0, 0.1, 0.7, 1.3)
+}
+
+# Cached run the Monte Carlo charts are drawn from, and the bootstrap behind
+# the confidence intervals in their annotations
+MC_SETTINGS = {"n_samples": 10000, "seed": 0, "n_boot": 1000, "ci_level": 0.95}
+
+# Samples are drawn in fixed-size blocks, each from its own child stream of the
+# seed, so results do not depend on how a run is split into chunks or workers
+MC_BLOCK_SIZE = 65_536
+
+
+def block_rng(seed, block):
+    """Random generator for one sample block, spawned from the run seed"""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block,)))
+
+
+def sample_parameters(rng, size):
+    """Draw Uptake, Compliance and HW_Factor arrays from the MC distributions"""
+    draws = []
+    for spec in MC_DISTRIBUTIONS.values():
+        if spec[0] == "triangular":
+            draws.append(rng.triangular(spec[1], spec[2], spec[3], size))
+        else:
+            # Normal draw clipped to [low, high]
+            draws.append(np.clip(rng.normal(spec[1], spec[2], size), spec[3], spec[4]))
+    return draws
+
+
+def monte_carlo_block(seed, block, size):
+    """Simulate one block: returns NPV arrays for both projects and the (size, 3) parameter matrix"""
+    uptake, compliance, hw_factor = sample_parameters(block_rng(seed, block), size)
+    npv_m1 = scenario_npv_array("MACRO1", uptake, compliance, hw_factor)
+    npv_m2 = scenario_npv_array("MACRO2", uptake, compliance, hw_factor)
+    return npv_m1, npv_m2, np.column_stack([uptake, compliance, hw_factor])
+
+
+def block_sizes(n_samples, block_size=MC_BLOCK_SIZE):
+    """Sizes of the sample blocks making up a run of n_samples"""
+    n_full, rest = divmod(n_samples, block_size)
+    return [block_size] * n_full + ([rest] if rest else [])
+
+
+def monte_carlo_arrays(n_samples=10000, seed=0):
+    """Vectorized Monte Carlo simulation returning NumPy arrays (npv_m1, npv_m2, parameters)"""
+    npv_m1 = np.empty(n_samples)
+    npv_m2 = np.empty(n_samples)
+    parameters = np.empty((n_samples, len(MC_DISTRIBUTIONS)))
+
+    offset = 0
+    for block, size in enumerate(block_sizes(n_samples)):
+        sl = slice(offset, offset + size)
+        npv_m1[sl], npv_m2[sl], parameters[sl] = monte_carlo_block(seed, block, size)
+        offset += size
+
+    return npv_m1, npv_m2, parameters
 
 
 def monte_carlo(n_samples=10000, seed=0):
     """Run Monte Carlo simulation and return results"""
-    np.random.seed(seed)
-    
-    results_m1 = []
-    results_m2 = []
-    parameters = []
-    
-    for _ in range(n_samples):
-        # Generate random parameters using triangular and truncated normal distributions
-        uptake = np.random.triangular(0.4, 0.8, 1.2)
-        compliance = np.random.triangular(0.8, 1.0, 1.3)
-        hw_factor = min(max(np.random.normal(1.0, 0.1), 0.7), 1.3)  # Truncated normal
-        
-        # Store parameters for correlation analysis
-        parameters.append([uptake, compliance, hw_factor])
-        
-        # Calculate NPVs with these parameters
-        npv_m1 = scenario_npv("MACRO1", uptake, compliance, hw_factor)
-        npv_m2 = scenario_npv("MACRO2", uptake, compliance, hw_factor)
-        
-        results_m1.append(npv_m1)
-        results_m2.append(npv_m2)
-    
-    param_df = pd.DataFrame(parameters, columns=["Uptake", "Compliance", "HW_Factor"])
-    
-    return results_m1, results_m2, param_df
\ No newline at end of file
+    import pandas as pd  # Only needed for the DataFrame; keeps `import utils` light
+
+    results_m1, results_m2, parameters = monte_carlo_arrays(n_samples, seed)
+    param_df = pd.DataFrame(parameters, columns=list(MC_DISTRIBUTIONS))
+
+    return results_m1, results_m2, param_df